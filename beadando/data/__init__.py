@@ -1 +1,29 @@
-# This file makes beadando a Python package
\ No newline at end of file
+# This file makes beadando a Python package
+import importlib
+
+
+# az almodulok csak az első hozzáféréskor töltődnek be (pl. data.generator)
+_SUBMODULES = {
+    "benchmark",
+    "cache",
+    "cli",
+    "diff",
+    "extsort",
+    "generator",
+    "handler",
+    "metrics",
+    "model_classes",
+    "model_dataclasses",
+    "partition",
+    "query",
+    "relations",
+    "shared",
+    "stats",
+    "validate",
+}
+
+
+def __getattr__(name: str):
+    if name in _SUBMODULES:
+        return importlib.import_module(f".{name}", __name__)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
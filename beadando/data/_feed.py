@@ -0,0 +1,38 @@
+import queue
+from concurrent.futures import Future
+
+
+# egyszerre legfeljebb ennyi chunk lehet úton a termelő és az író között
+PREFETCH = 4
+
+
+class Feed:
+    # chunkokat továbbít egy író szálnak; a korlátos sor visszanyomást (backpressure) ad
+    def __init__(self, maxsize: int = PREFETCH) -> None:
+        self.queue = queue.Queue(maxsize)
+        self.future: Future | None = None
+        self.closed = False
+
+    def put(self, chunk) -> None:
+        while True:
+            try:
+                self.queue.put(chunk, timeout=0.1)
+                return
+            except queue.Full:
+                if self.future is not None and self.future.done():
+                    # az író hibával leállt, a hibát itt dobjuk tovább
+                    self.future.result()
+                    raise RuntimeError("writer stopped before the end of the stream")
+
+    def close(self) -> None:
+        if not self.closed:
+            self.put(None)
+            self.closed = True
+
+    def chunks(self):
+        while (chunk := self.queue.get()) is not None:
+            yield chunk
+
+    def __iter__(self):
+        for chunk in self.chunks():
+            yield from chunk
@@ -0,0 +1,413 @@
+import argparse
+import contextlib
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime, timezone
+
+try:
+    import resource
+except ImportError:  # pragma: no cover - Windows
+    resource = None
+
+from . import generator, metrics
+from .handler import csv_dict, json_handler
+
+
+SIZES = (1_000, 10_000, 100_000, 1_000_000)
+FORMATS = ("csv", "json", "xlsx")
+WORKPLACE_RATIO = 10
+
+# importálási idő-keret (másodperc, friss interpreterben) és a közben tiltott függőségek
+IMPORT_BUDGETS = {
+    "generator": 0.1,
+    "handler.csv_dict": 0.1,
+    "handler.json_handler": 0.1,
+    "handler.xlsx": 0.1,
+    "handler.oracle": 0.1,
+}
+HEAVY_MODULES = ("faker", "openpyxl", "oracledb")
+# a mérési módszer verziója: eltérő módban készült futások rows/sec értékei nem összevethetők
+MEASURE_VERSION = 2
+
+
+def max_rss() -> int | None:
+    # a folyamat teljes élettartamára vett csúcs (nem nullázható), ezért futásonként egyszer kerül a riportba
+    if resource is None:
+        return None
+    usage = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return usage if sys.platform == "darwin" else usage * 1024
+
+
+def _proc_status(field: str) -> int | None:
+    try:
+        with open("/proc/self/status", encoding="ascii") as file:
+            for line in file:
+                if line.startswith(field + ":"):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+    return None
+
+
+def reset_peak_rss() -> bool:
+    # Linuxon a VmHWM (RSS high-water mark) a clear_refs-be írt "5"-tel nullázható, így esetenként mérhető
+    try:
+        with open("/proc/self/clear_refs", "w", encoding="ascii") as file:
+            file.write("5")
+        return True
+    except OSError:
+        return False
+
+
+def peak_rss() -> int | None:
+    return _proc_status("VmHWM")
+
+
+def current_rss() -> int | None:
+    return _proc_status("VmRSS")
+
+
+def output_bytes(path: str) -> int:
+    total = 0
+    for root, _, files in os.walk(path):
+        for name in files:
+            total += os.path.getsize(os.path.join(root, name))
+    return total
+
+
+def measure(case: str,
+            rows: int,
+            func,
+            trace_memory: bool = True,
+            output_dir: str | None = None,
+            reset=None) -> tuple[dict, object]:
+    # két menet: egy nem mért bemelegítő (trace_memory esetén tracemalloc-kal, ez adja a Python
+    # heap csúcsát), utána tracemalloc nélkül az idő és az RSS; így a mért menet módtól függetlenül
+    # meleg cache-ekkel fut. reset() a két menet között visszaállítja a mellékhatásokat
+    result = {"case": case, "rows": rows}
+    if trace_memory:
+        tracemalloc.start()
+    try:
+        func()
+    except Exception as e:
+        result["error"] = f"{type(e).__name__}: {e}"
+    finally:
+        if trace_memory:
+            result["peak_tracemalloc_bytes"] = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+    if "error" in result:
+        result.update(seconds=None, rows_per_sec=None, peak_rss_bytes=None, rss_delta_bytes=None,
+                      output_bytes=None)
+        return result, None
+    if reset is not None:
+        reset()
+
+    before = current_rss()
+    measured = reset_peak_rss()
+    start = time.perf_counter()
+    try:
+        value = func()
+    except Exception as e:
+        value = None
+        result["error"] = f"{type(e).__name__}: {e}"
+    elapsed = time.perf_counter() - start
+    peak = peak_rss() if measured else None
+
+    result["seconds"] = elapsed
+    result["rows_per_sec"] = rows / elapsed if elapsed > 0 and "error" not in result else None
+    result["peak_rss_bytes"] = peak
+    result["rss_delta_bytes"] = peak - before if peak is not None and before is not None else None
+    result["output_bytes"] = output_bytes(output_dir) if output_dir else None
+    return result, value
+
+
+def _write_xlsx(people, workplaces, addresses, path: str) -> None:
+    import openpyxl
+    from .handler import xlsx
+
+    workbook = openpyxl.Workbook()
+    workbook.remove(workbook.active)
+    xlsx.write_people(people, workbook)
+    xlsx.write_workplaces(workplaces, workbook)
+    xlsx.write_addresses(addresses, workbook)
+    workbook.save(os.path.join(path, "data.xlsx"))
+
+
+def _read_xlsx(path: str) -> int:
+    import openpyxl
+    from .handler import xlsx
+
+    workbook = openpyxl.load_workbook(os.path.join(path, "data.xlsx"))
+    return (len(xlsx.read_people(workbook))
+            + len(xlsx.read_workplaces(workbook))
+            + len(xlsx.read_addresses(workbook)))
+
+
+def _write_module(module, people, workplaces, addresses, path: str) -> None:
+    module.write_people(people, path)
+    module.write_workplaces(workplaces, path)
+    module.write_addresses(addresses, path)
+
+
+def _read_module(module, path: str) -> int:
+    return (len(module.read_people(path))
+            + len(module.read_workplaces(path))
+            + len(module.read_addresses(path)))
+
+
+def _unlink(workplaces, addresses) -> None:
+    # a generate_people mellékhatásai (employees, resident) a mért menet előtt visszaállítva
+    for workplace in workplaces:
+        workplace.employees.clear()
+    for address in addresses:
+        address.resident = None
+
+
+def run_size(n: int,
+             formats: tuple[str, ...] = FORMATS,
+             trace_memory: bool = True) -> list[dict]:
+    results = []
+    n_workplaces = max(1, n // WORKPLACE_RATIO)
+
+    result, workplaces = measure(
+        "generate_workplaces", n_workplaces,
+        lambda: generator.generate_workplaces(n_workplaces, unique=False),
+        trace_memory)
+    results.append(result)
+    result, addresses = measure(
+        "generate_addresses", n,
+        lambda: generator.generate_addresses(n, unique=False),
+        trace_memory)
+    results.append(result)
+    if workplaces is None or addresses is None:
+        return results
+
+    result, people = measure(
+        "generate_people", n,
+        lambda: generator.generate_people(n, workplaces.copy(), addresses),
+        trace_memory, reset=lambda: _unlink(workplaces, addresses))
+    results.append(result)
+    if people is None:
+        return results
+
+    total_rows = len(people) + len(workplaces) + len(addresses)
+    for fmt in formats:
+        with tempfile.TemporaryDirectory(prefix=f"bench_{fmt}_") as tmp:
+            if fmt == "xlsx":
+                write = lambda: _write_xlsx(people, workplaces, addresses, tmp)
+                read = lambda: _read_xlsx(tmp)
+            else:
+                module = {"csv": csv_dict, "json": json_handler}[fmt]
+                write = lambda: _write_module(module, people, workplaces, addresses, tmp)
+                read = lambda: _read_module(module, tmp)
+
+            result, _ = measure(f"{fmt}.write", total_rows, write, trace_memory, tmp)
+            results.append(result)
+            if "error" in result:
+                continue
+            result, _ = measure(f"{fmt}.read", total_rows, read, trace_memory, tmp)
+            results.append(result)
+
+    for result in results:
+        result["size"] = n
+    return results
+
+
+def import_time(module: str, repeat: int = 5) -> tuple[float, list[str]]:
+    code = (
+        "import sys, time\n"
+        "start = time.perf_counter()\n"
+        f"import {module}\n"
+        "elapsed = time.perf_counter() - start\n"
+        f"print(elapsed, *[m for m in {HEAVY_MODULES!r} if m in sys.modules])\n"
+    )
+    # a csomag gyökere fölötti könyvtár: "data" és "beadando.data" alakban importálva is működik
+    root = os.path.abspath(__file__)
+    for _ in range(__package__.count(".") + 2):
+        root = os.path.dirname(root)
+    timings = []
+    loaded = []
+    for _ in range(repeat):
+        output = subprocess.run([sys.executable, "-c", code], cwd=root,
+                                capture_output=True, text=True, check=True).stdout.split()
+        timings.append(float(output[0]))
+        loaded = output[1:]
+    return sorted(timings)[len(timings) // 2], loaded
+
+
+def check_imports(budgets: dict[str, float] = IMPORT_BUDGETS,
+                  tolerance: float = 1.0,
+                  repeat: int = 5) -> list[dict]:
+    # modulonkénti mérés; a keret tolerance-szeresét lépi túl a modul, ha over_budget
+    results = []
+    for module, budget in budgets.items():
+        name = f"{__package__}.{module}"
+        seconds, loaded = import_time(name, repeat)
+        results.append({
+            "module": name,
+            "seconds": seconds,
+            "budget": budget * tolerance,
+            "loaded": loaded,
+            "over_budget": seconds > budget * tolerance,
+        })
+    return results
+
+
+def import_failures(results: list[dict]) -> list[str]:
+    failures = []
+    for r in results:
+        if r["over_budget"]:
+            failures.append(f"{r['module']}: {r['seconds'] * 1000:.1f} ms > {r['budget'] * 1000:.0f} ms")
+        if r["loaded"]:
+            failures.append(f"{r['module']}: imports {', '.join(r['loaded'])} eagerly")
+    return failures
+
+
+def git_commit() -> str | None:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=os.path.dirname(__file__),
+            capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run(sizes=SIZES,
+        formats: tuple[str, ...] = FORMATS,
+        trace_memory: bool = True,
+        seed: int = 0) -> dict:
+    generator.set_seed(seed)
+
+    results = []
+    for n in sizes:
+        results.extend(run_size(n, formats, trace_memory))
+
+    return {
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "commit": git_commit(),
+        "python": platform.python_version(),
+        "implementation": platform.python_implementation(),
+        "platform": platform.platform(),
+        "seed": seed,
+        "trace_memory": trace_memory,
+        "measure": measure_mode(trace_memory),
+        "max_rss_bytes": max_rss(),
+        "results": results,
+    }
+
+
+def measure_mode(trace_memory: bool) -> dict:
+    return {"version": MEASURE_VERSION, "warmup": True, "trace_memory": trace_memory}
+
+
+def compare(current: dict, baseline: dict, threshold: float = 0.10) -> list[str]:
+    # visszaesés, ha a rows/sec több mint threshold aránnyal csökkent; csak azonos módban mért futások
+    # vethetők össze (a mód nélküli, régebbi fájlok sem)
+    if current.get("measure") != baseline.get("measure"):
+        raise ValueError(f"measurement mode differs: {current.get('measure')} vs baseline "
+                         f"{baseline.get('measure')}, rerun the baseline in the same mode")
+    previous = {(r["case"], r["size"]): r for r in baseline["results"]}
+    regressions = []
+    for result in current["results"]:
+        old = previous.get((result["case"], result["size"]))
+        if not old or not old.get("rows_per_sec") or not result.get("rows_per_sec"):
+            continue
+        ratio = result["rows_per_sec"] / old["rows_per_sec"]
+        if ratio < 1 - threshold:
+            regressions.append(
+                f"{result['case']} @ {result['size']}: "
+                f"{old['rows_per_sec']:.0f} -> {result['rows_per_sec']:.0f} rows/s ({ratio:.0%})"
+            )
+    return regressions
+
+
+def print_table(report: dict) -> None:
+    print(f"{'case':<22}{'size':>10}{'rows/s':>14}{'seconds':>10}{'heap MiB':>10}{'RSS MiB':>10}"
+          f"{'out MiB':>10}")
+    for r in report["results"]:
+        if "error" in r:
+            print(f"{r['case']:<22}{r['size']:>10}  ERROR {r['error']}")
+            continue
+        peak = r.get("peak_tracemalloc_bytes")
+        rss = r.get("peak_rss_bytes")
+        out = r.get("output_bytes")
+        print(f"{r['case']:<22}{r['size']:>10}{r['rows_per_sec']:>14.0f}{r['seconds']:>10.2f}"
+              f"{peak / 2**20 if peak is not None else float('nan'):>10.1f}"
+              f"{rss / 2**20 if rss is not None else float('nan'):>10.1f}"
+              f"{out / 2**20 if out is not None else float('nan'):>10.1f}")
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="Generator and handler benchmarks")
+    parser.add_argument("--sizes", type=int, nargs="+", default=list(SIZES))
+    parser.add_argument("--formats", nargs="+", choices=FORMATS, default=list(FORMATS))
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--no-trace-memory", action="store_true",
+                        help="skip the separate tracemalloc pass (faster, but no Python heap peak)")
+    parser.add_argument("--output", default=os.path.join("output", "benchmarks"),
+                        help="directory for the JSON result files")
+    parser.add_argument("--metrics", action="store_true",
+                        help="collect per-stage timers and counters into the result file")
+    parser.add_argument("--profile", metavar="PATH",
+                        help="write a cProfile capture of the whole run to PATH")
+    parser.add_argument("--check-imports", action="store_true",
+                        help="only check the import-time budget of the modules and exit")
+    parser.add_argument("--import-tolerance", type=float, default=1.0,
+                        help="multiplier applied to the import-time budgets (slow machines)")
+    parser.add_argument("--baseline", help="previous result file to compare against")
+    parser.add_argument("--threshold", type=float, default=0.10,
+                        help="allowed rows/sec drop before reporting a regression")
+    args = parser.parse_args(argv)
+
+    if args.check_imports:
+        results = check_imports(tolerance=args.import_tolerance)
+        for r in results:
+            status = "HEAVY IMPORT" if r["loaded"] else "OVER BUDGET" if r["over_budget"] else "ok"
+            print(f"{r['module']:<32}{r['seconds'] * 1000:>8.1f} ms  (budget {r['budget'] * 1000:.0f} ms)  "
+                  f"{status}")
+        failures = import_failures(results)
+        for line in failures:
+            print(f"FAIL {line}")
+        return 1 if failures else 0
+
+    if args.metrics:
+        metrics.enable()
+    with metrics.profile(args.profile) if args.profile else contextlib.nullcontext():
+        report = run(tuple(args.sizes), tuple(args.formats), not args.no_trace_memory, args.seed)
+    if args.metrics:
+        report["metrics"] = metrics.snapshot()
+        metrics.disable()
+    print_table(report)
+
+    os.makedirs(args.output, exist_ok=True)
+    stamp = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%SZ")
+    result_path = os.path.join(args.output, f"{report['commit'] or 'nogit'}-{stamp}.json")
+    with open(result_path, "w", encoding="utf-8") as file:
+        json.dump(report, file, indent=2)
+    print(f"Eredmények: {result_path}")
+
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as file:
+            baseline = json.load(file)
+        try:
+            regressions = compare(report, baseline, args.threshold)
+        except ValueError as e:
+            print(f"Nem összevethető: {e}", file=sys.stderr)
+            return 2
+        for line in regressions:
+            print(f"REGRESSION {line}")
+        if regressions:
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
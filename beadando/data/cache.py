@@ -0,0 +1,188 @@
+import hashlib
+import json
+import os
+import pickle
+import tempfile
+from importlib import metadata
+
+from . import generator, metrics, schema
+from .model_dataclasses import Person, Workplace, Address
+
+
+# a fájlformátum vagy a generátor viselkedésének változásakor növelni kell
+CACHE_VERSION = 2
+CACHE_DIR = os.environ.get(
+    "BEADANDO_CACHE_DIR",
+    os.path.join(os.path.expanduser("~"), ".cache", "beadando", "datasets"),
+)
+MAX_BYTES = int(os.environ.get("BEADANDO_CACHE_MAX_BYTES", 2 * 1024 ** 3))
+SUFFIX = ".pickle"
+
+
+def _faker_version() -> str | None:
+    # más Faker verzió ugyanazzal a seeddel más adatot ad, ezért a kulcs része
+    try:
+        return metadata.version("faker")
+    except metadata.PackageNotFoundError:
+        return None
+
+
+def cache_key(n: int,
+              n_workplaces: int | None = None,
+              seed: int | None = None,
+              locale: str | dict[str, float] = "hu_HU",
+              male_ratio: float = 0.5,
+              min_age: int = 0,
+              max_age: int = 100,
+              unique: bool = False) -> str:
+    params = {
+        "version": CACHE_VERSION,
+        "faker": _faker_version(),
+        "n": n,
+        "n_workplaces": n_workplaces or max(1, n // 10),
+        "seed": seed,
+        "locale": locale,
+        "male_ratio": male_ratio,
+        "min_age": min_age,
+        "max_age": max_age,
+        "unique": unique,
+    }
+    return hashlib.sha256(json.dumps(params, sort_keys=True).encode()).hexdigest()
+
+
+def _path(key: str, cache_dir: str | None) -> str:
+    return os.path.join(cache_dir or CACHE_DIR, key + SUFFIX)
+
+
+def save(key: str,
+         people: list[Person],
+         workplaces: list[Workplace],
+         addresses: list[Address],
+         cache_dir: str | None = None,
+         max_bytes: int | None = None) -> str:
+    path = _path(key, cache_dir)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    snapshot = {
+        "version": CACHE_VERSION,
+        "people": list(map(schema.encoder("person", "pickle"), people)),
+        "workplaces": list(map(schema.encoder("workplace", "pickle"), workplaces)),
+        "addresses": list(map(schema.encoder("address", "pickle"), addresses)),
+    }
+    # atomi csere, hogy egy párhuzamos olvasó soha ne lásson félig írt fájlt
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as file:
+            pickle.dump(snapshot, file, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.remove(tmp_path)
+        raise
+    metrics.count_file("cache.save.bytes", path)
+    evict(max_bytes, cache_dir)
+    return path
+
+
+def load(key: str,
+         cache_dir: str | None = None) -> tuple[list[Person], list[Workplace], list[Address]] | None:
+    path = _path(key, cache_dir)
+    try:
+        with open(path, "rb") as file:
+            snapshot = pickle.load(file)
+    except FileNotFoundError:
+        return None
+    except (pickle.UnpicklingError, EOFError, ValueError):
+        # sérült fájl: eldobjuk, mintha nem lett volna
+        invalidate(key, cache_dir)
+        return None
+    if snapshot.get("version") != CACHE_VERSION:
+        invalidate(key, cache_dir)
+        return None
+    # LRU: a módosítási idő jelzi az utolsó használatot
+    os.utime(path)
+
+    people = list(map(schema.decoder("person", "pickle"), snapshot["people"]))
+    workplaces = list(map(schema.decoder("workplace", "pickle"), snapshot["workplaces"]))
+    addresses = list(map(schema.decoder("address", "pickle"), snapshot["addresses"]))
+
+    # a kapcsolatok visszaállítása objektum-hivatkozásokra, ahogy a generator adja
+    workplaces_by_id = {w.id: w for w in workplaces}
+    addresses_by_id = {a.id: a for a in addresses}
+    for person in people:
+        person.workplace = workplaces_by_id.get(person.workplace)
+        person.address = addresses_by_id.get(person.address)
+        if person.address is not None:
+            person.address.resident = person
+    return people, workplaces, addresses
+
+
+def cached_dataset(n: int,
+                   n_workplaces: int | None = None,
+                   seed: int | None = None,
+                   locale: str | dict[str, float] = "hu_HU",
+                   male_ratio: float = 0.5,
+                   min_age: int = 0,
+                   max_age: int = 100,
+                   unique: bool = False,
+                   cache_dir: str | None = None,
+                   max_bytes: int | None = None) -> tuple[list[Person], list[Workplace], list[Address]]:
+    params = dict(n=n, n_workplaces=n_workplaces, seed=seed, locale=locale,
+                  male_ratio=male_ratio, min_age=min_age, max_age=max_age, unique=unique)
+    # seed nélkül a generálás nem reprodukálható, ilyenkor nincs mit cache-elni
+    if seed is None:
+        return generator.generate_dataset(**params)
+
+    key = cache_key(**params)
+    with metrics.timer("cache.load"):
+        dataset = load(key, cache_dir)
+    if dataset is not None:
+        metrics.count("cache.hits")
+        return dataset
+
+    metrics.count("cache.misses")
+    dataset = generator.generate_dataset(**params)
+    with metrics.timer("cache.save"):
+        save(key, *dataset, cache_dir=cache_dir, max_bytes=max_bytes)
+    return dataset
+
+
+def entries(cache_dir: str | None = None) -> list[tuple[str, int, float]]:
+    # (kulcs, méret, utolsó használat), a legrégebben használt elöl
+    directory = cache_dir or CACHE_DIR
+    if not os.path.isdir(directory):
+        return []
+    result = []
+    for name in os.listdir(directory):
+        if name.endswith(SUFFIX):
+            stat = os.stat(os.path.join(directory, name))
+            result.append((name[:-len(SUFFIX)], stat.st_size, stat.st_mtime))
+    return sorted(result, key=lambda entry: entry[2])
+
+
+def evict(max_bytes: int | None = None, cache_dir: str | None = None) -> list[str]:
+    limit = MAX_BYTES if max_bytes is None else max_bytes
+    current = entries(cache_dir)
+    total = sum(size for _, size, _ in current)
+    removed = []
+    for key, size, _ in current:
+        if total <= limit:
+            break
+        invalidate(key, cache_dir)
+        total -= size
+        removed.append(key)
+    metrics.count("cache.evictions", len(removed))
+    return removed
+
+
+def invalidate(key: str, cache_dir: str | None = None) -> bool:
+    try:
+        os.remove(_path(key, cache_dir))
+        return True
+    except FileNotFoundError:
+        return False
+
+
+def clear(cache_dir: str | None = None) -> int:
+    removed = 0
+    for key, _, _ in entries(cache_dir):
+        removed += invalidate(key, cache_dir)
+    return removed
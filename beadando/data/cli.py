@@ -0,0 +1,434 @@
+import argparse
+import json
+import os
+import sys
+import time
+from collections.abc import Callable, Iterable, Iterator
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from itertools import islice
+
+from . import extsort, generator, metrics, stats
+from ._feed import PREFETCH, Feed
+from .handler._files import COMPRESSIONS
+from .model_dataclasses import Person, Workplace, Address
+
+
+FORMATS = ("csv", "json", "xlsx", "oracle")
+EXECUTORS = ("process", "thread")
+# a (munkahely, sorszám, id) hármasok külső rendezésének futammérete (kb. 15 MiB memóriában)
+EMPLOYEE_RUN_SIZE = 100_000
+
+_workplaces: list[tuple] = []
+_options: dict = {}
+
+
+def _init_worker(workplaces: list[tuple], options: dict) -> None:
+    global _workplaces, _options
+    _workplaces = workplaces
+    _options = options
+
+
+def _init_process(workplaces: list[tuple], options: dict) -> None:
+    # worker folyamat: saját, üres metrika-registry (fork után a szülőé öröklődne)
+    _init_worker(workplaces, options)
+    if options["metrics"]:
+        metrics.enable()
+    else:
+        metrics.disable()
+
+
+def default_executor() -> str:
+    # free-threaded (3.13t) buildön szálak: nincs folyamatindítás és pickle; GIL mellett folyamatok
+    is_gil_enabled = getattr(sys, "_is_gil_enabled", None)
+    return "thread" if is_gil_enabled is not None and not is_gil_enabled() else "process"
+
+
+def _generate_chunk(task: tuple[int, int, int]) -> tuple[list[tuple], list[tuple]]:
+    # egy chunk generálása a workerben; tuple-öket ad vissza, hogy a pickle olcsó legyen
+    index, start, size = task
+    seed = _options["seed"]
+    if seed is not None:
+        generator.set_seed(seed + index)
+    return _build_chunk(start, size)
+
+
+def _generate_chunk_process(task: tuple[int, int, int]) -> tuple[tuple, dict | None]:
+    # a worker metrikái chunkonként visszakerülnek a fő folyamatba, ott egyesülnek
+    result = _generate_chunk(task)
+    if not metrics.enabled():
+        return result, None
+    snapshot = metrics.snapshot()
+    metrics.registry.reset()
+    return result, snapshot
+
+
+def _generate_chunk_local(task: tuple[int, int, int]) -> tuple[list[tuple], list[tuple]]:
+    # szálkészletben: szálankénti Random és Faker, a chunk seedje és id-tartománya csak az indexből
+    # jön, így zár nélkül és a szálak ütemezésétől függetlenül determinisztikus
+    index, start, size = task
+    seed = _options["seed"]
+    with generator.local_seed(seed + index if seed is not None else None):
+        return _build_chunk(start, size)
+
+
+def _build_chunk(start: int, size: int) -> tuple[list[tuple], list[tuple]]:
+    addresses = generator.generate_addresses(size,
+                                             unique=_options["unique"],
+                                             locale=_options["locale"],
+                                             start=start)
+    # minden chunk saját munkahely-példányokat kap, de csak a kiosztható (legfeljebb size) munkahelyekre;
+    # az employees listát a fő folyamat építi
+    workplaces = [Workplace(id, name, location)
+                  for id, name, location in generator.sample_workplaces(_workplaces, size)]
+    people = generator.generate_people(size,
+                                       workplaces=workplaces,
+                                       addresses=addresses,
+                                       male_ratio=_options["male_ratio"],
+                                       locale=_options["locale"],
+                                       unique=_options["unique"],
+                                       min_age=_options["min_age"],
+                                       max_age=_options["max_age"],
+                                       start=start)
+    return (
+        [(a.id, a.street, a.city, a.country) for a in addresses],
+        [(p.id, p.name, p.age, p.male, p.workplace.id) for p in people],
+    )
+
+
+def generate_chunks(n: int,
+                    workplaces: list[Workplace],
+                    chunk_size: int = 10_000,
+                    workers: int = 1,
+                    executor: str = "process",
+                    employees: extsort.ExternalSorter | None = None,
+                    **options):
+    # (people, addresses) párokat ad vissza sorrendben; a kapcsolatokat a fő folyamatban köti össze.
+    # employees megadásakor a Workplace.employees üres marad, a (pozíció, sorszám, id) hármasok
+    # a külső rendezőbe kerülnek (lásd _with_employees), így a memória nem nő n-nel
+    if executor not in EXECUTORS:
+        raise ValueError(f"Unknown executor: {executor!r}")
+    by_id = {w.id: w for w in workplaces}
+    add_employee = None
+    if employees is not None:
+        positions = {w.id: i for i, w in enumerate(workplaces)}
+        add_employee = lambda work, id: employees.add((positions[work.id], employees.count, id))
+    tasks = ((index, start, min(chunk_size, n - start))
+             for index, start in enumerate(range(0, n, chunk_size)))
+    template = [(w.id, w.name, w.location) for w in workplaces]
+
+    work = _generate_chunk_local if executor == "thread" else _generate_chunk
+    if workers > 1:
+        if executor == "thread":
+            # a szálak a modul-szintű sablont és opciókat csak olvassák
+            _init_worker(template, options)
+            pool = ThreadPoolExecutor(workers)
+        else:
+            work = _generate_chunk_process
+            pool = ProcessPoolExecutor(workers, initializer=_init_process,
+                                       initargs=(template, {**options, "metrics": metrics.enabled()}))
+        pending = []
+        try:
+            for task in islice(tasks, workers * PREFETCH):
+                pending.append(pool.submit(work, task))
+            while pending:
+                result = pending.pop(0).result()
+                for task in islice(tasks, 1):
+                    pending.append(pool.submit(work, task))
+                if work is _generate_chunk_process:
+                    result, snapshot = result
+                    if snapshot is not None:
+                        metrics.merge(snapshot)
+                yield _link(result, by_id, add_employee)
+        finally:
+            pool.shutdown(cancel_futures=True)
+    else:
+        _init_worker(template, options)
+        for task in tasks:
+            yield _link(work(task), by_id, add_employee)
+
+
+def _link(result: tuple[list[tuple], list[tuple]],
+          workplaces: dict[str, Workplace],
+          add_employee: Callable[[Workplace, str], None] | None = None) -> tuple[list[Person], list[Address]]:
+    address_rows, people_rows = result
+    addresses = [Address(*row) for row in address_rows]
+    people = []
+    for (id, name, age, male, workplace_id), address in zip(people_rows, addresses):
+        work = workplaces[workplace_id]
+        person = Person(id=id, name=name, age=age, male=male, workplace=work, address=address)
+        if add_employee is None:
+            work.employees.append(id)
+        else:
+            add_employee(work, id)
+        address.resident = person
+        people.append(person)
+    return people, addresses
+
+
+def _with_employees(workplaces: list[Workplace], employees: Iterable[tuple]) -> Iterator[Workplace]:
+    # a (pozíció, sorszám, id) szerint rendezett hármasokból munkahelyenként egy friss példány a
+    # dolgozóival, generálási sorrendben; egyszerre csak egy munkahely listája van memóriában
+    employees = iter(employees)
+    pending = next(employees, None)
+    for position, workplace in enumerate(workplaces):
+        members = []
+        while pending is not None and pending[0] == position:
+            members.append(pending[2])
+            pending = next(employees, None)
+        yield Workplace(workplace.id, workplace.name, workplace.location, members)
+
+
+def _oracle_connection():
+    from .handler import oracle
+
+    user = os.environ.get("ORACLE_USER")
+    password = os.environ.get("ORACLE_PASSWORD")
+    dsn = os.environ.get("ORACLE_DSN")
+    if not (user and password and dsn):
+        raise SystemExit("Oracle export needs ORACLE_USER, ORACLE_PASSWORD and ORACLE_DSN")
+    return oracle.get_oracle_connection(user, password, dsn, os.environ.get("ORACLE_LIB_DIR"))
+
+
+def _write_oracle(workplaces: list[Workplace], feed: Feed, batch_size: int) -> None:
+    from .handler import oracle
+
+    connection = _oracle_connection()
+    try:
+        # a munkahelyek előre ismertek, a FK miatt a címek és emberek chunkonként, sorrendben mennek
+        oracle.write_workplaces_oracle(workplaces, connection, batch_size=batch_size)
+        oracle.write_addresses_oracle([], connection)
+        oracle.write_people_oracle([], connection)
+        for people, addresses in feed.chunks():
+            oracle.write_addresses_oracle(addresses, connection, create=False, batch_size=batch_size)
+            oracle.write_people_oracle(people, connection, create=False, batch_size=batch_size)
+    finally:
+        connection.close()
+
+
+def export(n: int,
+           formats: list[str],
+           output: str,
+           n_workplaces: int | None = None,
+           chunk_size: int = 10_000,
+           workers: int = 1,
+           executor: str | None = None,
+           seed: int | None = None,
+           compression: str | None = None,
+           locale: str | dict[str, float] = "hu_HU",
+           male_ratio: float = 0.5,
+           min_age: int = 0,
+           max_age: int = 100,
+           unique: bool = False,
+           sort_by: str | None = None,
+           partition_by: str | None = None,
+           collect_stats: bool = False) -> dict[str, int]:
+    from .handler import csv_dict, json_handler
+
+    os.makedirs(output, exist_ok=True)
+    if seed is not None:
+        generator.set_seed(seed)
+    workplaces = generator.generate_workplaces(n_workplaces or max(1, n // 10),
+                                               unique=unique, locale=locale)
+
+    feeds: list[Feed] = []
+    workplace_writers = []
+    finishers = []
+    writer_pool = ThreadPoolExecutor(max_workers=3 * len(formats))
+
+    def order(entity: str, target):
+        # rendezett kimenet: a writer a külső rendezés kimenetét kapja (a sorrend a stream végén dől el)
+        if sort_by is None or sort_by not in extsort.SORT_KEYS[entity]:
+            return target
+        return lambda objects, *args, **kwargs: target(
+            extsort.sorted_objects(objects, entity, sort_by), *args, **kwargs)
+
+    def start_writer(target, *args, **kwargs) -> Feed:
+        feed = Feed()
+        feed.future = writer_pool.submit(target, feed, *args, **kwargs)
+        feeds.append(feed)
+        return feed
+
+    def start_people_writer(fmt: str, target, *args, **kwargs) -> Feed:
+        if partition_by is None:
+            return start_writer(order("person", target), *args, **kwargs)
+        # az emberek <output>/people/<kulcs>=<érték>/ könyvtárakba kerülnek
+        from .partition import write_partitioned
+
+        return start_writer(write_partitioned, os.path.join(output, "people"), partition_by, fmt,
+                            compression=compression, sort_by=sort_by)
+
+    people_feeds = []
+    address_feeds = []
+    for fmt in formats:
+        if fmt in ("csv", "json"):
+            module = csv_dict if fmt == "csv" else json_handler
+            people_feeds.append(start_people_writer(fmt, module.write_people,
+                                                    output, compression=compression))
+            address_feeds.append(start_writer(order("address", module.write_addresses),
+                                              output, compression=compression))
+            workplace_writers.append(lambda module=module: start_writer(
+                order("workplace", module.write_workplaces), output, compression=compression))
+        elif fmt == "xlsx":
+            import openpyxl
+            from .handler import xlsx
+
+            workbook = openpyxl.Workbook(write_only=True)
+            people_feeds.append(start_people_writer(fmt, xlsx.write_people, workbook))
+            address_feeds.append(start_writer(order("address", xlsx.write_addresses), workbook))
+            workplace_writers.append(lambda workbook=workbook: start_writer(
+                order("workplace", xlsx.write_workplaces), workbook))
+            finishers.append(lambda workbook=workbook: workbook.save(os.path.join(output, "data.xlsx")))
+        elif fmt == "oracle":
+            # chunkonként (people, addresses) párokat kap; táblában a sorrendnek nincs jelentősége
+            oracle_feed = Feed()
+            oracle_feed.future = writer_pool.submit(_write_oracle, workplaces, oracle_feed, chunk_size)
+            feeds.append(oracle_feed)
+        else:
+            raise ValueError(f"Unknown format: {fmt!r}")
+
+    counts = {"people": 0, "addresses": 0, "workplaces": len(workplaces)}
+    # a statisztika a fő szálon, chunkonként egyszer frissül, bárhány formátumba írunk
+    collector = stats.Stats() if collect_stats else None
+    # a dolgozólisták a stream végéig temp fájlokban (külső rendezés), nem a Workplace példányokban
+    employees = extsort.ExternalSorter(run_size=EMPLOYEE_RUN_SIZE)
+    try:
+        for people, addresses in generate_chunks(
+                n, workplaces, chunk_size, workers, executor or default_executor(),
+                employees=employees,
+                seed=seed, unique=unique, locale=locale, male_ratio=male_ratio,
+                min_age=min_age, max_age=max_age):
+            for feed in people_feeds:
+                feed.put(people)
+            for feed in address_feeds:
+                feed.put(addresses)
+            if "oracle" in formats:
+                oracle_feed.put((people, addresses))
+            if collector is not None:
+                collector.update("person", people)
+                collector.update("address", addresses)
+            counts["people"] += len(people)
+            counts["addresses"] += len(addresses)
+
+        # a munkahelyek employees listája csak a stream végére teljes; az emberek és címek lezárása
+        # után munkahelyenként összefésülve, chunkokban mennek az íróknak (xlsx-ben így utolsó lap)
+        for feed in people_feeds + address_feeds:
+            feed.close()
+        workplace_feeds = [start() for start in workplace_writers]
+        stream = _with_employees(workplaces, employees)
+        while chunk := list(islice(stream, chunk_size)):
+            for feed in workplace_feeds:
+                feed.put(chunk)
+            if collector is not None:
+                collector.update("workplace", chunk)
+    finally:
+        employees.close()
+        for feed in feeds:
+            if not feed.closed and not feed.future.done():
+                feed.close()
+        writer_pool.shutdown(wait=True)
+    for feed in feeds:
+        feed.future.result()
+
+    for finish in finishers:
+        finish()
+    if collector is not None:
+        collector.save(os.path.join(output, stats.SIDECAR))
+    return counts
+
+
+def parse_locale(value: str) -> str | dict[str, float]:
+    # "hu_HU" vagy súlyozott keverék: "hu_HU:0.7,de_DE:0.2,en_US:0.1"
+    if ":" not in value:
+        return value
+    locales = {}
+    for part in value.split(","):
+        name, _, weight = part.partition(":")
+        try:
+            locales[name.strip()] = float(weight) if weight else 1.0
+        except ValueError:
+            raise argparse.ArgumentTypeError(f"invalid locale weight: {part!r}")
+    return locales
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(
+        prog="python -m data",
+        description="Generate people, workplaces and addresses and export them")
+    parser.add_argument("-n", "--people", type=int, required=True,
+                        help="number of people (one address is generated per person)")
+    parser.add_argument("--workplaces", type=int, default=None,
+                        help="number of workplaces (default: people / 10)")
+    parser.add_argument("-f", "--format", dest="formats", nargs="+", choices=FORMATS,
+                        default=["csv"])
+    parser.add_argument("-o", "--output", default="output")
+    parser.add_argument("-w", "--workers", type=int, default=1,
+                        help="generator processes (or threads, see --executor)")
+    parser.add_argument("--executor", choices=EXECUTORS, default=None,
+                        help="run generator workers in processes or threads "
+                             "(default: thread on free-threaded builds, process otherwise)")
+    parser.add_argument("--chunk-size", type=int, default=10_000)
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--compression", choices=[c for c in COMPRESSIONS if c], default=None,
+                        help="compression for csv / json output")
+    parser.add_argument("--locale", type=parse_locale, default="hu_HU",
+                        help='locale or weighted mix, e.g. "hu_HU:0.7,de_DE:0.2,en_US:0.1"')
+    parser.add_argument("--male-ratio", type=float, default=0.5)
+    parser.add_argument("--min-age", type=int, default=0)
+    parser.add_argument("--max-age", type=int, default=100)
+    parser.add_argument("--unique", action="store_true",
+                        help="unique Faker values (names, addresses) within a chunk; only for small "
+                             "chunks, Faker runs out of unique countries after a few hundred")
+    parser.add_argument("--sort-by", choices=extsort.SORT_BY, default=None,
+                        help="sort file exports (external merge sort, bounded memory); "
+                             "keys an entity does not have keep generation order")
+    parser.add_argument("--partition-by", choices=("city", "country", "age"), default=None,
+                        help="write people into Hive-style <key>=<value>/ directories (file formats)")
+    parser.add_argument("--stats", action="store_true",
+                        help=f"write aggregate statistics to {stats.SIDECAR} in the output directory")
+    parser.add_argument("--metrics", action="store_true",
+                        help="print per-stage timers and counters as JSON at the end")
+    args = parser.parse_args(argv)
+
+    if args.people <= 0 or args.chunk_size <= 0 or args.workers <= 0:
+        parser.error("--people, --chunk-size and --workers must be positive")
+    if args.workplaces is not None and args.workplaces <= 0:
+        parser.error("--workplaces must be positive")
+    if not 0 <= args.male_ratio <= 1:
+        parser.error("--male-ratio must be between 0 and 1")
+    if not 0 <= args.min_age <= args.max_age <= 100:
+        parser.error("--min-age and --max-age must satisfy 0 <= min-age <= max-age <= 100")
+    if isinstance(args.locale, dict) and (any(weight < 0 for weight in args.locale.values())
+                                          or sum(args.locale.values()) <= 0):
+        parser.error("--locale weights must be non-negative with a positive sum")
+
+    if args.metrics:
+        metrics.enable()
+    started = time.perf_counter()
+    counts = export(args.people, args.formats, args.output,
+                    n_workplaces=args.workplaces,
+                    chunk_size=args.chunk_size,
+                    workers=args.workers,
+                    executor=args.executor,
+                    seed=args.seed,
+                    compression=args.compression,
+                    locale=args.locale,
+                    male_ratio=args.male_ratio,
+                    min_age=args.min_age,
+                    max_age=args.max_age,
+                    unique=args.unique,
+                    sort_by=args.sort_by,
+                    partition_by=args.partition_by,
+                    collect_stats=args.stats)
+    elapsed = time.perf_counter() - started
+
+    rows = sum(counts.values())
+    print(f"{counts['people']} people, {counts['workplaces']} workplaces, "
+          f"{counts['addresses']} addresses -> {', '.join(args.formats)} in {args.output}")
+    print(f"{elapsed:.2f} s, {rows / elapsed:.0f} rows/s")
+    if args.metrics:
+        print(json.dumps(metrics.snapshot(), indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
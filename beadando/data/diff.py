@@ -0,0 +1,225 @@
+import argparse
+import json
+import pickle
+import sys
+import tempfile
+import zlib
+from collections import Counter
+from collections.abc import Iterable, Iterator
+from dataclasses import dataclass
+from operator import itemgetter
+
+from . import extsort, metrics, schema
+from .handler._files import COMPRESSIONS
+from .handler._formats import FORMATS, iter_objects
+
+
+ENTITIES = ("person", "workplace", "address")
+MODES = ("sort", "hash")
+# hash módban ennyi vödörre oszlik mindkét oldal; egyszerre egy vödör bal oldala van memóriában
+BUCKETS = 64
+
+
+@dataclass
+class Change:
+    kind: str                   # added / removed / changed
+    entity: str
+    id: str
+    record: dict | None = None  # added / removed: a teljes rekord
+    fields: dict | None = None  # changed: mező -> [régi, új]
+
+    def to_dict(self) -> dict:
+        result = {"kind": self.kind, "entity": self.entity, "id": self.id}
+        if self.record is not None:
+            result["record"] = self.record
+        if self.fields is not None:
+            result["fields"] = self.fields
+        return result
+
+
+def _rows(fmt: str, path: str, entity: str, compression: str | None) -> Iterator[tuple]:
+    # formátumfüggetlen összehasonlítás: a pickle kodek tuple-jei (a kapcsolatok id-ként)
+    encode = schema.encoder(entity, "pickle")
+    for obj in iter_objects(fmt, path, entity, compression):
+        yield obj.id, encode(obj)
+
+
+def _compare(entity: str, columns: tuple[str, ...], left: tuple | None, right: tuple | None) -> Change | None:
+    if right is None:
+        return Change("removed", entity, left[0], record=dict(zip(columns, left[1])))
+    if left is None:
+        return Change("added", entity, right[0], record=dict(zip(columns, right[1])))
+    if left[1] == right[1]:
+        return None
+    fields = {name: [old, new] for name, old, new in zip(columns, left[1], right[1]) if old != new}
+    return Change("changed", entity, left[0], fields=fields)
+
+
+def _duplicate(entity: str, id: str, side: str) -> ValueError:
+    return ValueError(f"duplicate {entity} id {id!r} in the {side} export")
+
+
+def _distinct(entity: str, rows: Iterable[tuple], side: str) -> Iterator[tuple]:
+    # rendezett streamen az ismétlődő id egymás melletti sorokban jelenik meg
+    previous = None
+    for row in rows:
+        if previous is not None and row[0] == previous:
+            raise _duplicate(entity, row[0], side)
+        previous = row[0]
+        yield row
+
+
+def _diff_sorted(entity: str, left: Iterable[tuple], right: Iterable[tuple]) -> Iterator[Change]:
+    # merge join két id szerint rendezett streamen
+    columns = schema.get_schema(entity).columns("pickle")
+    left = _distinct(entity, left, "left")
+    right = _distinct(entity, right, "right")
+    a = next(left, None)
+    b = next(right, None)
+    while a is not None or b is not None:
+        if b is None or (a is not None and a[0] < b[0]):
+            yield _compare(entity, columns, a, None)
+            a = next(left, None)
+        elif a is None or b[0] < a[0]:
+            yield _compare(entity, columns, None, b)
+            b = next(right, None)
+        else:
+            if (change := _compare(entity, columns, a, b)) is not None:
+                yield change
+            a = next(left, None)
+            b = next(right, None)
+
+
+def _bucket(rows: Iterable[tuple], buckets: int, tmp_dir: str | None) -> list:
+    # id hash szerint vödrökbe (temp fájlokba) szórja a sorokat; a crc32 folyamatok között is stabil
+    files = [tempfile.TemporaryFile(dir=tmp_dir) for _ in range(buckets)]
+    buffers = [[] for _ in range(buckets)]
+    try:
+        for row in rows:
+            index = zlib.crc32(row[0].encode()) % buckets
+            buffer = buffers[index]
+            buffer.append(row)
+            if len(buffer) >= extsort.BATCH_SIZE:
+                pickle.dump(buffer, files[index], protocol=pickle.HIGHEST_PROTOCOL)
+                buffer.clear()
+        for buffer, file in zip(buffers, files):
+            if buffer:
+                pickle.dump(buffer, file, protocol=pickle.HIGHEST_PROTOCOL)
+            file.seek(0)
+    except BaseException:
+        for file in files:
+            file.close()
+        raise
+    return files
+
+
+def _diff_hashed(entity: str, left: Iterable[tuple], right: Iterable[tuple],
+                 buckets: int, tmp_dir: str | None) -> Iterator[Change]:
+    columns = schema.get_schema(entity).columns("pickle")
+    left_files = _bucket(left, buckets, tmp_dir)
+    try:
+        right_files = _bucket(right, buckets, tmp_dir)
+    except BaseException:
+        for file in left_files:
+            file.close()
+        raise
+    for left_file, right_file in zip(left_files, right_files):
+        # vödrönként a bal oldal dict-be kerül, a jobb oldal streamelve megy át rajta
+        pending = {}
+        for id, row in extsort.read_run(left_file):
+            if id in pending:
+                raise _duplicate(entity, id, "left")
+            pending[id] = row
+        seen = set()
+        for id, row in extsort.read_run(right_file):
+            if id in seen:
+                raise _duplicate(entity, id, "right")
+            seen.add(id)
+            old = pending.pop(id, None)
+            change = _compare(entity, columns, None if old is None else (id, old), (id, row))
+            if change is not None:
+                yield change
+        for id, row in pending.items():
+            yield _compare(entity, columns, (id, row), None)
+
+
+def diff_entity(entity: str,
+                left_path: str,
+                right_path: str,
+                left_fmt: str = "csv",
+                right_fmt: str = "csv",
+                left_compression: str | None = None,
+                right_compression: str | None = None,
+                mode: str = "sort",
+                buckets: int = BUCKETS,
+                run_size: int = extsort.OBJECT_RUN_SIZE,
+                tmp_dir: str | None = None) -> Iterator[Change]:
+    # sort: id sorrendű kimenet külső rendezéssel; hash: vödrönként, rendezés nélkül (gyorsabb)
+    if mode not in MODES:
+        raise ValueError(f"Unknown mode: {mode!r}")
+    left = _rows(left_fmt, left_path, entity, left_compression)
+    right = _rows(right_fmt, right_path, entity, right_compression)
+    if mode == "hash":
+        changes = _diff_hashed(entity, left, right, buckets, tmp_dir)
+    else:
+        changes = _diff_sorted(
+            entity,
+            extsort.external_sort(left, itemgetter(0), run_size=run_size, tmp_dir=tmp_dir),
+            extsort.external_sort(right, itemgetter(0), run_size=run_size, tmp_dir=tmp_dir))
+    for change in changes:
+        metrics.count(f"diff.{entity}.{change.kind}")
+        yield change
+
+
+def diff(left_path: str,
+         right_path: str,
+         left_fmt: str = "csv",
+         right_fmt: str = "csv",
+         entities: Iterable[str] = ENTITIES,
+         **options) -> Iterator[Change]:
+    for entity in entities:
+        yield from diff_entity(schema.get_schema(entity).name, left_path, right_path,
+                               left_fmt, right_fmt, **options)
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(
+        prog="python -m data.diff",
+        description="Record-level diff of two exports (JSON lines: added / removed / changed)")
+    parser.add_argument("left", help="old export directory (or .xlsx file)")
+    parser.add_argument("right", help="new export directory (or .xlsx file)")
+    parser.add_argument("--left-format", choices=FORMATS, default="csv")
+    parser.add_argument("--right-format", choices=FORMATS, default=None,
+                        help="default: same as --left-format")
+    parser.add_argument("--left-compression", choices=[c for c in COMPRESSIONS if c], default=None)
+    parser.add_argument("--right-compression", choices=[c for c in COMPRESSIONS if c], default=None)
+    parser.add_argument("--entity", dest="entities", nargs="+", choices=ENTITIES, default=list(ENTITIES))
+    parser.add_argument("--mode", choices=MODES, default="sort",
+                        help="sort: external merge join, output in id order; hash: bucketed, faster")
+    parser.add_argument("--buckets", type=int, default=BUCKETS)
+    parser.add_argument("--tmp-dir", default=None)
+    parser.add_argument("--summary", action="store_true", help="print only the counts")
+    args = parser.parse_args(argv)
+
+    counts = Counter()
+    changes = diff(args.left, args.right, args.left_format, args.right_format or args.left_format,
+                   args.entities,
+                   left_compression=args.left_compression,
+                   right_compression=args.right_compression,
+                   mode=args.mode, buckets=args.buckets, tmp_dir=args.tmp_dir)
+    try:
+        for change in changes:
+            counts[f"{change.entity}.{change.kind}"] += 1
+            if not args.summary:
+                print(json.dumps(change.to_dict(), ensure_ascii=False))
+    except ValueError as e:
+        # ismétlődő id: a diff nem értelmezhető
+        print(e, file=sys.stderr)
+        return 2
+    if args.summary:
+        print(json.dumps(dict(sorted(counts.items())), indent=2))
+    return 1 if counts else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
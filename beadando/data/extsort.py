@@ -0,0 +1,174 @@
+import heapq
+import pickle
+import tempfile
+from collections.abc import Callable, Iterable, Iterator
+from itertools import islice
+from operator import attrgetter, itemgetter
+
+from . import metrics, schema
+
+
+# ennyi elem fér egyszerre memóriába egy futamban; felette rendezett futamok kerülnek temp fájlba
+RUN_SIZE = 1_000_000
+# modell objektumoknál (kulcs + pickle tuple) kisebb futam
+OBJECT_RUN_SIZE = 200_000
+# egy pickle.dump hívásban kiírt elemek száma
+BATCH_SIZE = 4096
+
+
+def _write_run(items: list, tmp_dir: str | None):
+    file = tempfile.TemporaryFile(dir=tmp_dir)
+    for start in range(0, len(items), BATCH_SIZE):
+        pickle.dump(items[start:start + BATCH_SIZE], file, protocol=pickle.HIGHEST_PROTOCOL)
+    file.seek(0)
+    return file
+
+
+def read_run(file) -> Iterator:
+    try:
+        while True:
+            try:
+                batch = pickle.load(file)
+            except EOFError:
+                return
+            yield from batch
+    finally:
+        file.close()
+
+
+def _ref(value) -> str:
+    if value is None:
+        return ""
+    return value if value.__class__ is str else value.id
+
+
+def _person_city(person) -> tuple[str, str]:
+    # csak objektumként kapott címnél ismert a város (beolvasott fájlban a cím csak id)
+    address = person.address
+    city = address.city if address is not None and address.__class__ is not str else ""
+    return city or "", person.id
+
+
+def _person_workplace(person) -> tuple[str, str]:
+    return _ref(person.workplace), person.id
+
+
+# entitás -> rendezési szempont -> kulcs; egyező kulcsnál az id dönt, így a sorrend determinisztikus
+SORT_KEYS = {
+    "person": {
+        "id": attrgetter("id"),
+        "city": _person_city,
+        "age": attrgetter("age", "id"),
+        "workplace": _person_workplace,
+    },
+    "workplace": {
+        "id": attrgetter("id"),
+        "city": attrgetter("location", "id"),
+    },
+    "address": {
+        "id": attrgetter("id"),
+        "city": attrgetter("city", "id"),
+    },
+}
+SORT_BY = ("id", "city", "age", "workplace")
+
+
+class ExternalSorter:
+    # add()-dal gyűjt, a RUN_SIZE-onként rendezett futamokat temp fájlba írja, majd heapq.merge-dzsel fésüli össze
+    def __init__(self,
+                 key: Callable | None = None,
+                 reverse: bool = False,
+                 run_size: int = RUN_SIZE,
+                 tmp_dir: str | None = None) -> None:
+        assert run_size > 0
+        self.key = key
+        self.reverse = reverse
+        self.run_size = run_size
+        self.tmp_dir = tmp_dir
+        self.buffer: list = []
+        self.runs: list = []
+        self.count = 0
+
+    def add(self, item) -> None:
+        self.buffer.append(item)
+        self.count += 1
+        if len(self.buffer) >= self.run_size:
+            self._spill()
+
+    def extend(self, items: Iterable) -> None:
+        items = iter(items)
+        while batch := list(islice(items, self.run_size - len(self.buffer))):
+            self.buffer.extend(batch)
+            self.count += len(batch)
+            if len(self.buffer) >= self.run_size:
+                self._spill()
+
+    def _spill(self) -> None:
+        with metrics.timer("extsort.spill"):
+            self.buffer.sort(key=self.key, reverse=self.reverse)
+            self.runs.append(_write_run(self.buffer, self.tmp_dir))
+        metrics.count("extsort.runs")
+        self.buffer = []
+
+    def __iter__(self) -> Iterator:
+        # egyszer járható be; a temp fájlok a bejárás végén (vagy close()-nál) törlődnek
+        if not self.runs:
+            self.buffer.sort(key=self.key, reverse=self.reverse)
+            buffer, self.buffer = self.buffer, []
+            return iter(buffer)
+        if self.buffer:
+            self._spill()
+        runs, self.runs = self.runs, []
+        return heapq.merge(*map(read_run, runs), key=self.key, reverse=self.reverse)
+
+    def close(self) -> None:
+        for run in self.runs:
+            run.close()
+        self.runs = []
+        self.buffer = []
+
+    def __enter__(self) -> "ExternalSorter":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+
+def external_sort(items: Iterable,
+                  key: Callable | None = None,
+                  reverse: bool = False,
+                  run_size: int = RUN_SIZE,
+                  tmp_dir: str | None = None) -> Iterator:
+    sorter = ExternalSorter(key, reverse, run_size, tmp_dir)
+    try:
+        sorter.extend(items)
+    except BaseException:
+        sorter.close()
+        raise
+    return iter(sorter)
+
+
+def sort_key(entity: str, by: str) -> Callable:
+    keys = SORT_KEYS[schema.get_schema(entity).name]
+    if by not in keys:
+        raise ValueError(f"Cannot sort {entity} by {by!r}, choose from {', '.join(keys)}")
+    return keys[by]
+
+
+def sorted_objects(objects: Iterable,
+                   entity: str,
+                   by: str = "id",
+                   reverse: bool = False,
+                   run_size: int = OBJECT_RUN_SIZE,
+                   tmp_dir: str | None = None) -> Iterator:
+    # a futamokba (kulcs, pickle tuple) párok kerülnek, így a kapcsolatok objektumgráfja nem szerializálódik;
+    # a kimenetben a kapcsolatok id-k, amit minden handler író kezel
+    entity = schema.get_schema(entity).name
+    key = sort_key(entity, by)
+    encode = schema.encoder(entity, "pickle")
+    decode = schema.decoder(entity, "pickle")
+    pairs = ((key(obj), encode(obj)) for obj in objects)
+    with metrics.timer("extsort.sort"):
+        rows = external_sort(pairs, itemgetter(0), reverse, run_size, tmp_dir)
+    for _, row in rows:
+        yield decode(row)
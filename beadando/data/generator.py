@@ -1,104 +1,273 @@
-from faker import Faker
+from . import metrics
 from .model_dataclasses import Person, Workplace, Address
+from collections.abc import Sequence
+from contextlib import contextmanager
+from time import perf_counter
 import random
+import threading
 
 
+# folyamatszintű Faker-példányok locale-onként; a Faker(locale) létrehozása drága
+_faker_pool = {}
+_faker_pool_lock = threading.Lock()
+_seed = None
+# szálankénti állapot (local_seed): saját Random és locale-onkénti saját Faker példányok
+_local = threading.local()
+
+
+def get_faker(locale: str = "hu_HU", seed: int | None = None):
+    fake = _faker_pool.get(locale)
+    if fake is None:
+        with _faker_pool_lock:
+            fake = _faker_pool.get(locale)
+            if fake is None:
+                # a faker (és a provider modulok) betöltése csak az első generáláskor
+                from faker import Faker
+                fake = Faker(locale)
+                if _seed is not None:
+                    fake.seed_instance(f"{_seed}:{locale}")
+                _faker_pool[locale] = fake
+    if seed is not None:
+        fake.seed_instance(f"{seed}:{locale}")
+    return fake
+
+
+def set_seed(seed: int | None) -> None:
+    # a random modul és minden (már meglévő és később létrejövő) pool-beli Faker seedelése
+    global _seed
+    random.seed(seed)
+    with _faker_pool_lock:
+        _seed = seed
+        for locale, fake in _faker_pool.items():
+            fake.seed_instance(f"{seed}:{locale}" if seed is not None else None)
+
+
+def clear_faker_pool() -> None:
+    with _faker_pool_lock:
+        _faker_pool.clear()
+
+
+@contextmanager
+def local_seed(seed: int | None):
+    # a hívó szálban a modul-szintű random és a közös Faker pool helyett szálankénti példányok;
+    # ugyanazzal a seeddel ugyanazt generálja, mint a set_seed, így a szálak száma nem számít
+    previous = getattr(_local, "rng", None), getattr(_local, "seed", None)
+    fakers = _local.__dict__.setdefault("fakers", {})
+    _local.rng = random.Random(seed)
+    _local.seed = seed
+    for locale, fake in fakers.items():
+        fake.seed_instance(f"{seed}:{locale}" if seed is not None else None)
+    try:
+        yield _local.rng
+    finally:
+        _local.rng, _local.seed = previous
+
+
+def _random():
+    rng = getattr(_local, "rng", None)
+    return random if rng is None else rng
+
+
+def _local_faker(locale: str):
+    # a Faker példány szálon belül chunkról chunkra újrahasznosul, a seedet a local_seed állítja
+    fakers = _local.fakers
+    fake = fakers.get(locale)
+    if fake is None:
+        from faker import Faker
+        fake = Faker(locale)
+        fake.seed_instance(f"{_local.seed}:{locale}" if _local.seed is not None else None)
+        fakers[locale] = fake
+    return fake
+
+
+def _faker(locale: str, unique: bool):
+    fake = _local_faker(locale) if getattr(_local, "rng", None) is not None else get_faker(locale)
+    if not unique:
+        return fake
+    # hívásonként saját unique proxy (üres halmazzal): a pool-beli példány megosztott, a fake.unique
+    # törlése egy párhuzamos hívás halmazát is törölné. A közös RNG miatt párhuzamos hívásoknál a
+    # kimenet nem determinisztikus, arra a local_seed való
+    from faker.proxy import UniqueProxy
+
+    return UniqueProxy(fake)
+
+
+def locale_batches(locale: str | dict[str, float], n: int) -> list[tuple[str, int]]:
+    # {"hu_HU": 0.7, "de_DE": 0.2, "en_US": 0.1} -> [("hu_HU", 70), ("de_DE", 20), ("en_US", 10)]
+    if isinstance(locale, str):
+        return [(locale, n)]
+    assert locale and all(weight >= 0 for weight in locale.values())
+    total = sum(locale.values())
+    assert total > 0
+    exact = [(name, n * weight / total) for name, weight in locale.items()]
+    counts = {name: int(share) for name, share in exact}
+    # a maradékot a legnagyobb törtrészek kapják (largest remainder)
+    remainder = n - sum(counts.values())
+    for name, share in sorted(exact, key=lambda item: item[1] - int(item[1]), reverse=True)[:remainder]:
+        counts[name] += 1
+    return [(name, counts[name]) for name in locale if counts[name] > 0]
+
+
+def sample_workplaces(workplaces: Sequence, n: int) -> list:
+    # n emberhez elég legfeljebb n különböző munkahely: a generate_people ezekből visszatevés nélkül
+    # húz, így az eloszlás ugyanaz, mint a teljes listából, de a költség O(n), nem O(len(workplaces))
+    return _random().sample(workplaces, min(n, len(workplaces)))
+
+
+@metrics.timed("generate.people")
 def generate_people(n: int,
                     workplaces: list[Workplace] = None,
                     addresses: list[Address] = None,
                     male_ratio: float = 0.5,
-                    locale: str = "hu_HU",
+                    locale: str | dict[str, float] = "hu_HU",
                     unique: bool = False,
                     min_age: int = 0,
-                    max_age: int = 100) -> list[Person]:
+                    max_age: int = 100,
+                    start: int = 0,
+                    residents_per_address: int = 1,
+                    link_employees: bool = True) -> list[Person]:
 
     assert n > 0
     assert 0 <= male_ratio <= 1
     assert min_age >= 0
     assert min_age <= max_age <= 100
+    assert start >= 0
+    assert residents_per_address >= 1
 
 
+    rng = _random()
     people = []
+    n_addresses = -(-n // residents_per_address)
     if workplaces is None:      
-        workplaces = generate_workplaces(n=random.randint(1, n))
-    if addresses is None or len(addresses) < n:
-        addresses = generate_addresses(n)
+        workplaces = generate_workplaces(n=rng.randint(1, n), locale=locale)
+    if addresses is None or len(addresses) < n_addresses:
+        addresses = generate_addresses(n_addresses, locale=locale, start=start)
     
     used_workplaces = []
-    fake = Faker(locale)
-    fake = fake if not unique else fake.unique
+    timed = metrics.enabled()
+    faker_time = model_time = 0.0
     
-    for i in range(n):
-        # munkahely hozzárendelés
-        if len(workplaces) != 0:
-            work = workplaces.pop(random.randrange(len(workplaces)))
-            used_workplaces.append(work)
-        else:
-            work = used_workplaces[random.randrange(len(used_workplaces))]
-        
-        # cím hozzárendelés
-        address = addresses[i] if i < len(addresses) else None
-        
-        # nem és név generálása
-        male = random.random() < male_ratio
-        person = Person(
-            id=f"P-{str(i + 1).zfill(6)}",
-            name=fake.unique.name_male() if male else fake.unique.name_female(),
-            age=random.randint(min_age, max_age),
-            male=male,
-            workplace=work,
-            address=address)
-        
-        # kapcsolatok beállítása
-        work.employees.append(person.id)
-        if address:
-            address.resident = person
-        people.append(person)
+    i = 0
+    for batch_locale, count in locale_batches(locale, n):
+        # locale-onként egy batch, így nincs folyamatos példányváltás
+        with metrics.timer("generate.people.faker_init"):
+            fake = _faker(batch_locale, unique)
 
+        for _ in range(count):
+            # munkahely hozzárendelés
+            if len(workplaces) != 0:
+                work = workplaces.pop(rng.randrange(len(workplaces)))
+                used_workplaces.append(work)
+            else:
+                work = used_workplaces[rng.randrange(len(used_workplaces))]
+            
+            # cím hozzárendelés: egymás után residents_per_address ember kap egy címet, csak az
+            # utolsóra juthat kevesebb (a teljes lakólista: relations.build_relations)
+            position = i // residents_per_address
+            address = addresses[position] if position < len(addresses) else None
+            
+            # nem és név generálása
+            male = rng.random() < male_ratio
+            if timed:
+                t0 = perf_counter()
+            name = fake.name_male() if male else fake.name_female()
+            if timed:
+                t1 = perf_counter()
+                faker_time += t1 - t0
+            person = Person(
+                id=f"P-{str(start + i + 1).zfill(6)}",
+                name=name,
+                age=rng.randint(min_age, max_age),
+                male=male,
+                workplace=work,
+                address=address)
+            if timed:
+                model_time += perf_counter() - t1
+            
+            # kapcsolatok beállítása; link_employees=False esetén a CSR tárolja őket
+            if link_employees:
+                work.employees.append(person.id)
+            if address:
+                address.resident = person
+            people.append(person)
+            i += 1
+
+    if timed:
+        metrics.add_time("generate.people.faker", faker_time)
+        metrics.add_time("generate.people.model", model_time)
+    metrics.count("generate.people.rows", n)
     return people
 
+@metrics.timed("generate.workplaces")
 def generate_workplaces(n: int,
                        location: str = None,
                        unique: bool = True,
-                       locale: str = "hu_HU") -> list[Workplace]:
+                       locale: str | dict[str, float] = "hu_HU") -> list[Workplace]:
 
     assert n > 0
     
     workplaces = []
-    fake = Faker(locale)
-    fake = fake if not unique else fake.unique
-    for i in range(n):
-        workplace = Workplace(
-            id = f"WP-{str(i + 1).zfill(6)}",
-            name = fake.company(),
-            location=location if location else fake.city()
-        )
-        workplaces.append(workplace)
+    i = 0
+    for batch_locale, count in locale_batches(locale, n):
+        with metrics.timer("generate.workplaces.faker_init"):
+            fake = _faker(batch_locale, unique)
+        for _ in range(count):
+            workplace = Workplace(
+                id = f"WP-{str(i + 1).zfill(6)}",
+                name = fake.company(),
+                location=location if location else fake.city()
+            )
+            workplaces.append(workplace)
+            i += 1
     
+    metrics.count("generate.workplaces.rows", n)
     return workplaces
 
+@metrics.timed("generate.addresses")
 def generate_addresses(n: int,
                       country: str = None,
                       unique: bool = True,
-                      locale: str = "hu_HU") -> list[Address]:
+                      locale: str | dict[str, float] = "hu_HU",
+                      start: int = 0) -> list[Address]:
 
     assert n > 0
     
     addresses = []
-    fake = Faker(locale)
-    fake = fake if not unique else fake.unique
-    
-    for i in range(n):
-        address = Address(
-            id=f"A-{str(i + 1).zfill(6)}",
-            street=fake.street_address(),
-            city=fake.city(),
-            country=country if country else fake.country()
-        )
-        addresses.append(address)
+    i = 0
+    for batch_locale, count in locale_batches(locale, n):
+        with metrics.timer("generate.addresses.faker_init"):
+            fake = _faker(batch_locale, unique)
+        for _ in range(count):
+            address = Address(
+                id=f"A-{str(start + i + 1).zfill(6)}",
+                street=fake.street_address(),
+                city=fake.city(),
+                country=country if country else fake.country()
+            )
+            addresses.append(address)
+            i += 1
     
+    metrics.count("generate.addresses.rows", n)
     return addresses
 
+def generate_dataset(n: int,
+                     n_workplaces: int | None = None,
+                     seed: int | None = None,
+                     locale: str | dict[str, float] = "hu_HU",
+                     male_ratio: float = 0.5,
+                     min_age: int = 0,
+                     max_age: int = 100,
+                     unique: bool = False) -> tuple[list[Person], list[Workplace], list[Address]]:
+    # n ember, n cím és n_workplaces (alapból n / 10) munkahely; seed megadásával determinisztikus
+    if seed is not None:
+        set_seed(seed)
+    workplaces = generate_workplaces(n_workplaces or max(1, n // 10), unique=unique, locale=locale)
+    addresses = generate_addresses(n, unique=unique, locale=locale)
+    people = generate_people(n, workplaces.copy(), addresses,
+                             male_ratio=male_ratio, locale=locale, unique=unique,
+                             min_age=min_age, max_age=max_age)
+    return people, workplaces, addresses
+
 if __name__ == "__main__":
     workplaces = generate_workplaces(4)
     addresses = generate_addresses(6)
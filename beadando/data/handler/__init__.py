@@ -1 +1,12 @@
-# This file makes handler a Python subpackage
\ No newline at end of file
+# This file makes handler a Python subpackage
+import importlib
+
+
+# az openpyxl / oracledb függőségek csak a megfelelő handler első használatakor töltődnek be
+_SUBMODULES = {"csv_dict", "json_handler", "oracle", "xlsx"}
+
+
+def __getattr__(name: str):
+    if name in _SUBMODULES:
+        return importlib.import_module(f".{name}", __name__)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -0,0 +1,31 @@
+import os
+
+
+# tömörítés neve -> fájlkiterjesztés
+COMPRESSIONS = {None: "", "gzip": ".gz", "bz2": ".bz2", "xz": ".xz"}
+
+
+def file_path(path: str,
+              file_name: str,
+              extension: str,
+              compression: str | None = None) -> str:
+    if compression not in COMPRESSIONS:
+        raise ValueError(f"Unknown compression: {compression!r}")
+    return os.path.join(path, file_name + extension + COMPRESSIONS[compression])
+
+
+def open_file(file_path: str,
+              mode: str = "r",
+              compression: str | None = None,
+              **kwargs):
+    if compression is None:
+        return open(file_path, mode, **kwargs)
+    if compression == "gzip":
+        import gzip as module
+    elif compression == "bz2":
+        import bz2 as module
+    elif compression == "xz":
+        import lzma as module
+    else:
+        raise ValueError(f"Unknown compression: {compression!r}")
+    return module.open(file_path, mode + "t", **kwargs)
@@ -0,0 +1,75 @@
+import os
+from collections.abc import Iterable, Iterator
+
+
+# fájl alapú formátumok, amelyeket soronként (streamelve) lehet olvasni
+FORMATS = ("csv", "json", "xlsx")
+# entitás -> fájl- / lapnév
+NAMES = {"person": "people", "workplace": "workplaces", "address": "addresses"}
+XLSX_FILE = "data.xlsx"
+
+
+def xlsx_path(path: str, entity: str | None = None) -> str:
+    # könyvtár esetén a write_objects által írt <entitás>.xlsx (pl. people.xlsx), ha van, különben
+    # a CLI által írt, mindhárom lapot tartalmazó data.xlsx
+    if path.endswith(".xlsx"):
+        return path
+    if entity is not None:
+        entity_path = os.path.join(path, NAMES[entity] + ".xlsx")
+        if os.path.exists(entity_path):
+            return entity_path
+    return os.path.join(path, XLSX_FILE)
+
+
+def _iter_workbook(path: str, entity: str, where: dict | None) -> Iterator:
+    import openpyxl
+    from . import xlsx
+
+    workbook = openpyxl.load_workbook(xlsx_path(path, entity), read_only=True)
+    try:
+        yield from getattr(xlsx, "iter_" + NAMES[entity])(workbook, where=where)
+    finally:
+        workbook.close()
+
+
+def iter_objects(fmt: str,
+                 path: str,
+                 entity: str,
+                 compression: str | None = None,
+                 where: dict | None = None) -> Iterator:
+    if entity not in NAMES:
+        raise KeyError(f"Unknown entity: {entity!r}")
+    if fmt == "csv":
+        from . import csv_dict as module
+    elif fmt == "json":
+        from . import json_handler as module
+    elif fmt == "xlsx":
+        return _iter_workbook(path, entity, where)
+    else:
+        raise ValueError(f"Unknown format: {fmt!r}")
+    return getattr(module, "iter_" + NAMES[entity])(path, compression=compression, where=where)
+
+
+def write_objects(objects: Iterable,
+                  fmt: str,
+                  path: str,
+                  entity: str,
+                  compression: str | None = None) -> None:
+    # a path könyvtárba a szokásos fájlnévvel (people.csv, people.xlsx, ...)
+    if entity not in NAMES:
+        raise KeyError(f"Unknown entity: {entity!r}")
+    if fmt == "csv":
+        from . import csv_dict as module
+    elif fmt == "json":
+        from . import json_handler as module
+    elif fmt == "xlsx":
+        import openpyxl
+        from . import xlsx
+
+        workbook = openpyxl.Workbook(write_only=True)
+        getattr(xlsx, "write_" + NAMES[entity])(objects, workbook)
+        workbook.save(os.path.join(path, NAMES[entity] + ".xlsx"))
+        return
+    else:
+        raise ValueError(f"Unknown format: {fmt!r}")
+    getattr(module, "write_" + NAMES[entity])(objects, path, compression=compression)
@@ -1,127 +1,217 @@
 import csv
+import io
 import os
+from collections.abc import Iterable, Iterator
+from itertools import islice
+from time import perf_counter
 
-from ..generator import generate_people, generate_workplaces, generate_addresses
+from .. import metrics, schema
+from ._files import file_path as _file_path, open_file
 from ..model_dataclasses import Person, Workplace, Address
+from ..relations import RELATIONS, Relations, from_adjacency
 
 
-def write_people(people: list[Person],
+# ennyi sor kerül egyszerre kódolásra és a fájlba
+BATCH_SIZE = 1000
+
+
+def _write_rows(objects: Iterable,
+                entity: str,
+                metric: str,
+                file_path: str,
+                heading: bool,
+                delimiter: str,
+                compression: str | None) -> None:
+    encode = schema.encoder(entity, "csv")
+    objects = iter(objects)
+    with open_file(file_path, "w", compression,
+                   newline="\n", encoding="utf-8") as file:
+        # batch-enként külön mérhető a kódolás (encode: sorok + CSV szöveg) és az írás
+        # (write: tömörítés + fájl I/O, hisztogram batch-enként)
+        buffer = io.StringIO()
+        writer = csv.writer(buffer, delimiter=delimiter)
+        if heading:
+            writer.writerow(schema.get_schema(entity).columns("csv"))
+        rows = 0
+        while batch := list(islice(objects, BATCH_SIZE)):
+            t0 = perf_counter()
+            writer.writerows(map(encode, batch))
+            text = buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+            t1 = perf_counter()
+            file.write(text)
+            metrics.add_time(metric + ".encode", t1 - t0)
+            metrics.observe(metric + ".write", perf_counter() - t1)
+            rows += len(batch)
+        file.write(buffer.getvalue())
+    metrics.count(metric + ".rows", rows)
+    metrics.count_file(metric + ".bytes", file_path)
+
+
+def _iter_rows(entity: str,
+               file_path: str,
+               delimiter: str,
+               compression: str | None,
+               where: dict | None = None) -> Iterator:
+    with open_file(file_path, "r", compression,
+                   newline="\n", encoding="utf-8") as file:
+        rows = csv.reader(file, delimiter=delimiter)
+        header = next(rows, None)
+        if header is None:
+            return
+        if where:
+            rows = filter(schema.row_filter(entity, "csv", where, tuple(header)), rows)
+        yield from map(schema.decoder(entity, "csv", tuple(header)), rows)
+
+
+def _read_rows(entity: str,
+               metric: str,
+               file_path: str,
+               delimiter: str,
+               compression: str | None) -> list:
+    objects = list(_iter_rows(entity, file_path, delimiter, compression))
+    metrics.count(metric + ".rows", len(objects))
+    return objects
+
+
+@metrics.timed("csv.write_people")
+def write_people(people: Iterable[Person],
                  path: str,
                  file_name: str = "people",
                  extension: str = ".csv",
                  heading: bool = True,
-                 delimiter: str = ";") -> None:
-    with open(os.path.join(path, file_name + extension), "w",
-              newline="\n", encoding="utf-8") as file:
-        writer = csv.DictWriter(file, delimiter=delimiter,
-                    fieldnames=["id", "name", "age", "male", "workplace", "address"])
-        if heading:
-            writer.writeheader()
-        for person in people:
-            row_data = {
-                "id": person.id,
-                "name": person.name,
-                "age": person.age,
-                "male": person.male,
-                "workplace": str(person.workplace) if person.workplace else "",
-                "address": person.address.id if person.address else ""
-            }
-            writer.writerow(row_data)
+                 delimiter: str = ";",
+                 compression: str | None = None) -> None:
+    _write_rows(people, "person", "csv.write_people",
+                _file_path(path, file_name, extension, compression),
+                heading, delimiter, compression)
 
+@metrics.timed("csv.read_people")
 def read_people(path: str,
                  file_name: str = "people",
                  extension: str = ".csv",
-                 delimiter: str = ";") -> None:
-    with open(os.path.join(path, file_name + extension),
-              newline="\n", encoding="utf-8") as file:
-        rows = csv.DictReader(file, delimiter=delimiter)
-        people = []
-        for row in rows:
-            people.append(
-                Person(
-                    id=row["id"],
-                    name=row["name"],
-                    age=int(row["age"]),
-                    male=row["male"].lower() == 'true',
-                    workplace=row.get("workplace") if row.get("workplace") else None,
-                    address=row.get("address") if row.get("address") else None
-                )
-            )
-        return people
-
-def write_workplaces(workplaces: list[Workplace],
+                 delimiter: str = ";",
+                 compression: str | None = None) -> list[Person]:
+    return _read_rows("person", "csv.read_people",
+                      _file_path(path, file_name, extension, compression),
+                      delimiter, compression)
+
+def iter_people(path: str,
+                file_name: str = "people",
+                extension: str = ".csv",
+                delimiter: str = ";",
+                compression: str | None = None,
+                where: dict | None = None) -> Iterator[Person]:
+    # soronként olvas, a teljes fájl nem kerül memóriába; where: mező -> predikátum
+    return _iter_rows("person", _file_path(path, file_name, extension, compression),
+                      delimiter, compression, where)
+
+@metrics.timed("csv.write_workplaces")
+def write_workplaces(workplaces: Iterable[Workplace],
                      path: str,
                         file_name: str = "workplaces",
                         extension: str = ".csv",
                         heading: bool = True,
-                        delimiter: str = ";") -> None:
-    with open(os.path.join(path, file_name + extension), "w",
-              newline="\n", encoding="utf-8") as file:
-        writer = csv.DictWriter(file, delimiter=delimiter,
-                                fieldnames=["id", "name", "location", "employees"])
-        if heading:
-            writer.writeheader()
-        for workplace in workplaces:
-            writer.writerow({"id": workplace.id, "name": workplace.name, "location": workplace.location, "employees": ",".join(workplace.employees)})
+                        delimiter: str = ";",
+                        compression: str | None = None) -> None:
+    _write_rows(workplaces, "workplace", "csv.write_workplaces",
+                _file_path(path, file_name, extension, compression),
+                heading, delimiter, compression)
 
+@metrics.timed("csv.read_workplaces")
 def read_workplaces(path: str,
                    file_name: str = "workplaces",
                    extension: str = ".csv",
-                   delimiter: str = ";") -> list[Workplace]:
-    with open(os.path.join(path, file_name + extension),
-              newline="\n", encoding="utf-8") as file:
-        rows = csv.DictReader(file, delimiter=delimiter)
-        workplaces = []
-        for row in rows:
-            employees = row["employees"].split(",") if row["employees"] else []
-            employees = [emp.strip() for emp in employees if emp.strip()]
-            workplaces.append(
-                Workplace(row["id"], row["name"], row["location"], employees)
-            )
-        return workplaces
-
-def write_addresses(addresses: list[Address],
+                   delimiter: str = ";",
+                   compression: str | None = None) -> list[Workplace]:
+    return _read_rows("workplace", "csv.read_workplaces",
+                      _file_path(path, file_name, extension, compression),
+                      delimiter, compression)
+
+def iter_workplaces(path: str,
+                    file_name: str = "workplaces",
+                    extension: str = ".csv",
+                    delimiter: str = ";",
+                    compression: str | None = None,
+                    where: dict | None = None) -> Iterator[Workplace]:
+    return _iter_rows("workplace", _file_path(path, file_name, extension, compression),
+                      delimiter, compression, where)
+
+@metrics.timed("csv.write_addresses")
+def write_addresses(addresses: Iterable[Address],
                     path: str,
                     file_name: str = "addresses",
                     extension: str = ".csv",
                     heading: bool = True,
-                    delimiter: str = ";") -> None:
-    with open(os.path.join(path, file_name + extension), "w",
-              newline="\n", encoding="utf-8") as file:
-        writer = csv.DictWriter(file, delimiter=delimiter,
-                                fieldnames=["id", "street", "city", "country", "resident"])
-        if heading:
-            writer.writeheader()
-        for address in addresses:
-            writer.writerow({
-                "id": address.id,
-                "street": address.street,
-                "city": address.city,
-                "country": address.country,
-                "resident": address.resident.id if address.resident else ""
-            })
+                    delimiter: str = ";",
+                    compression: str | None = None) -> None:
+    _write_rows(addresses, "address", "csv.write_addresses",
+                _file_path(path, file_name, extension, compression),
+                heading, delimiter, compression)
 
+@metrics.timed("csv.read_addresses")
 def read_addresses(path: str,
                    file_name: str = "addresses",
                    extension: str = ".csv",
-                   delimiter: str = ";") -> list[Address]:
-    with open(os.path.join(path, file_name + extension),
-              newline="\n", encoding="utf-8") as file:
-        rows = csv.DictReader(file, delimiter=delimiter)
-        addresses = []
-        for row in rows:
-            addresses.append(
-                Address(
-                    id=row["id"],
-                    street=row["street"],
-                    city=row["city"],
-                    country=row["country"],
-                    resident=row.get("resident") if row.get("resident") else None
-                )
-            )
-        return addresses
+                   delimiter: str = ";",
+                   compression: str | None = None) -> list[Address]:
+    return _read_rows("address", "csv.read_addresses",
+                      _file_path(path, file_name, extension, compression),
+                      delimiter, compression)
+
+def iter_addresses(path: str,
+                   file_name: str = "addresses",
+                   extension: str = ".csv",
+                   delimiter: str = ";",
+                   compression: str | None = None,
+                   where: dict | None = None) -> Iterator[Address]:
+    return _iter_rows("address", _file_path(path, file_name, extension, compression),
+                      delimiter, compression, where)
+
+@metrics.timed("csv.write_relations")
+def write_relations(relations: Relations,
+                    path: str,
+                    extension: str = ".csv",
+                    heading: bool = True,
+                    delimiter: str = ";",
+                    compression: str | None = None) -> None:
+    # relációnként egy fájl (employees.csv, residents.csv): id;tagok vesszővel elválasztva
+    for relation in RELATIONS:
+        file_path = _file_path(path, relation, extension, compression)
+        with open_file(file_path, "w", compression,
+                       newline="\n", encoding="utf-8") as file:
+            writer = csv.writer(file, delimiter=delimiter)
+            if heading:
+                writer.writerow(("id", "members"))
+            writer.writerows((row_id, ",".join(members))
+                             for row_id, members in relations.adjacency(relation))
+        metrics.count_file("csv.write_relations.bytes", file_path)
+
+def iter_relation(path: str,
+                  relation: str,
+                  extension: str = ".csv",
+                  delimiter: str = ";",
+                  compression: str | None = None) -> Iterator[tuple[str, list[str]]]:
+    # (sor id, tag id-k) párok soronként
+    with open_file(_file_path(path, relation, extension, compression), "r", compression,
+                   newline="\n", encoding="utf-8") as file:
+        rows = csv.reader(file, delimiter=delimiter)
+        next(rows, None)
+        for row_id, members in rows:
+            yield row_id, members.split(",") if members else []
+
+@metrics.timed("csv.read_relations")
+def read_relations(path: str,
+                   extension: str = ".csv",
+                   delimiter: str = ";",
+                   compression: str | None = None) -> Relations:
+    return from_adjacency(*(iter_relation(path, relation, extension, delimiter, compression)
+                            for relation in RELATIONS))
 
 if __name__ == "__main__":
+    from ..generator import generate_people, generate_workplaces, generate_addresses
+
     # Teszt könyvtár létrehozása
     output_path = os.path.join(
         os.path.dirname(os.path.dirname(os.path.dirname(__file__))),
@@ -1,121 +1,225 @@
 import json
 import os
+import re
+from collections.abc import Iterable, Iterator
+from itertools import islice
+from time import perf_counter
 
-from .. import generator
+from .. import metrics, schema
 from ..model_dataclasses import Person, Workplace, Address
+from ..relations import Relations
+from ._files import file_path as _file_path, open_file
 
-def write_people(people: list[Person],
+
+# elemek közti whitespace és vessző, illetve a tömb eleje
+_SEPARATOR = re.compile(r"[\s,]*")
+_ARRAY_START = re.compile(r"\s*\[")
+
+def _dump_array(objects: Iterable, file, indent: int, batch_size: int = 1000,
+                encode=None, metric: str | None = None) -> int:
+    # a json.dump(list, indent=...) kimenetével azonos, de batch-enként ír, nem épít teljes listát;
+    # metric megadásakor batch-enként mér: <metric>.encode (dict + JSON szöveg), <metric>.write (hisztogram)
+    encoder = json.JSONEncoder(indent=indent)
+    objects = iter(objects)
+    count = 0
+    file.write("[")
+    while batch := list(islice(objects, batch_size)):
+        t0 = perf_counter()
+        if encode is not None:
+            batch = list(map(encode, batch))
+        # "[\n  {...},\n  {...}\n]" -> "\n  {...},\n  {...}"
+        text = ("," if count else "") + encoder.encode(batch)[1:-2]
+        t1 = perf_counter()
+        file.write(text)
+        if metric is not None:
+            metrics.add_time(metric + ".encode", t1 - t0)
+            metrics.observe(metric + ".write", perf_counter() - t1)
+        count += len(batch)
+    file.write("\n]" if count else "]")
+    return count
+
+
+def _iter_array(file, chunk_size: int = 1 << 16) -> Iterator:
+    # egy JSON tömb elemei egyenként, a fájl darabonkénti olvasásával (json.load helyett)
+    decoder = json.JSONDecoder()
+    buffer = file.read(chunk_size)
+    eof = not buffer
+    start = _ARRAY_START.match(buffer)
+    if start is None:
+        raise ValueError("expected a JSON array")
+    pos = start.end()
+    while True:
+        pos = _SEPARATOR.match(buffer, pos).end()
+        if pos < len(buffer) and buffer[pos] == "]":
+            return
+        try:
+            obj, end = decoder.raw_decode(buffer, pos)
+        except json.JSONDecodeError:
+            end = None
+        # a puffer végén álló elem csonka lehet: előbb továbbolvasunk
+        if end is None or (end == len(buffer) and not eof):
+            if eof:
+                raise ValueError("truncated JSON array")
+            chunk = file.read(chunk_size)
+            eof = not chunk
+            buffer = buffer[pos:] + chunk
+            pos = 0
+            continue
+        yield obj
+        pos = end
+
+
+def _write_objects(objects: Iterable,
+                   entity: str,
+                   metric: str,
+                   file_path: str,
+                   pretty: bool,
+                   compression: str | None) -> None:
+    encode = schema.encoder(entity, "json")
+    with open_file(file_path, "w", compression) as file:
+        rows = _dump_array(objects, file, 2 if pretty else 0, encode=encode, metric=metric)
+    metrics.count(metric + ".rows", rows)
+    metrics.count_file(metric + ".bytes", file_path)
+
+
+def _read_objects(entity: str,
+                  metric: str,
+                  file_path: str,
+                  compression: str | None) -> list:
+    with open_file(file_path, "r", compression) as file:
+        with metrics.timer(metric + ".load"):
+            objects = json.load(file)
+    decode = schema.decoder(entity, "json")
+    result = [decode(obj) for obj in objects]
+    metrics.count(metric + ".rows", len(result))
+    return result
+
+
+def _iter_objects(entity: str,
+                  file_path: str,
+                  compression: str | None,
+                  where: dict | None = None) -> Iterator:
+    with open_file(file_path, "r", compression) as file:
+        objects = _iter_array(file)
+        if where:
+            objects = filter(schema.row_filter(entity, "json", where), objects)
+        yield from map(schema.decoder(entity, "json"), objects)
+
+
+@metrics.timed("json.write_people")
+def write_people(people: Iterable[Person],
                  path: str,
                  file_name: str = "people",
                  extension: str = ".json",
-                 pretty: bool = True) -> None:
-    with open(os.path.join(path, file_name + extension), "w") as file:
-        people_data = []
-        for person in people:
-            person_dict = {
-                "id": person.id,
-                "name": person.name,
-                "age": person.age,
-                "male": person.male,
-                "workplace": person.workplace.id if person.workplace else None,
-                "address": person.address.id if person.address else None
-            }
-            people_data.append(person_dict)
-        
-        json.dump(people_data, file, indent=2 if pretty else 0)
+                 pretty: bool = True,
+                 compression: str | None = None) -> None:
+    _write_objects(people, "person", "json.write_people",
+                   _file_path(path, file_name, extension, compression),
+                   pretty, compression)
 
 
+@metrics.timed("json.read_people")
 def read_people(path: str,
                 file_name: str = "people",
-                extension: str = ".json") -> list[Person]:
-    with open(os.path.join(path, file_name + extension)) as file:
-        people = []
-        objects = json.load(file)
-        for obj in objects:
-            person = Person(
-                id=obj["id"], 
-                name=obj["name"], 
-                age=obj["age"],
-                male=obj["male"],
-                workplace=obj.get("workplace"),  
-                address=obj.get("address")  
-            )
-            people.append(person)
-        return people
-
-
-def write_workplaces(workplaces: list[Workplace],
+                extension: str = ".json",
+                compression: str | None = None) -> list[Person]:
+    return _read_objects("person", "json.read_people",
+                         _file_path(path, file_name, extension, compression),
+                         compression)
+
+
+def iter_people(path: str,
+                file_name: str = "people",
+                extension: str = ".json",
+                compression: str | None = None,
+                where: dict | None = None) -> Iterator[Person]:
+    # elemenként olvas, a teljes fájl nem kerül memóriába; where: mező -> predikátum
+    return _iter_objects("person", _file_path(path, file_name, extension, compression),
+                         compression, where)
+
+
+@metrics.timed("json.write_workplaces")
+def write_workplaces(workplaces: Iterable[Workplace],
                      path: str,
                      file_name: str = "workplaces",
                      extension: str = ".json",
-                     pretty: bool = True) -> None:
-    with open(os.path.join(path, file_name + extension), "w") as file:
-        workplaces_data = []
-        for workplace in workplaces:
-            workplace_dict = {
-                "id": workplace.id,
-                "name": workplace.name,
-                "location": workplace.location,
-                "employees": workplace.employees  
-            }
-            workplaces_data.append(workplace_dict)
-        
-        json.dump(workplaces_data, file, indent=2 if pretty else 0)
+                     pretty: bool = True,
+                     compression: str | None = None) -> None:
+    _write_objects(workplaces, "workplace", "json.write_workplaces",
+                   _file_path(path, file_name, extension, compression),
+                   pretty, compression)
 
 
+@metrics.timed("json.read_workplaces")
 def read_workplaces(path: str,
                     file_name: str = "workplaces",
-                    extension: str = ".json") -> list[Workplace]:
-    with open(os.path.join(path, file_name + extension)) as file:
-        workplaces = []
-        objects = json.load(file)
-        for obj in objects:
-            workplace = Workplace(
-                id=obj["id"],
-                name=obj["name"],
-                location=obj["location"],
-                employees=obj.get("employees", [])  
-            )
-            workplaces.append(workplace)
-        return workplaces
-
-
-def write_addresses(addresses: list[Address],
+                    extension: str = ".json",
+                    compression: str | None = None) -> list[Workplace]:
+    return _read_objects("workplace", "json.read_workplaces",
+                         _file_path(path, file_name, extension, compression),
+                         compression)
+
+
+def iter_workplaces(path: str,
+                    file_name: str = "workplaces",
+                    extension: str = ".json",
+                    compression: str | None = None,
+                    where: dict | None = None) -> Iterator[Workplace]:
+    return _iter_objects("workplace", _file_path(path, file_name, extension, compression),
+                         compression, where)
+
+
+@metrics.timed("json.write_addresses")
+def write_addresses(addresses: Iterable[Address],
                     path: str,
                     file_name: str = "addresses",
                     extension: str = ".json",
-                    pretty: bool = True) -> None:
-    with open(os.path.join(path, file_name + extension), "w") as file:
-        addresses_data = []
-        for address in addresses:
-            address_dict = {
-                "id": address.id,
-                "street": address.street,
-                "city": address.city,
-                "country": address.country,
-                "resident": address.resident.id if address.resident else None
-            }
-            addresses_data.append(address_dict)
-        
-        json.dump(addresses_data, file, indent=2 if pretty else 0)
+                    pretty: bool = True,
+                    compression: str | None = None) -> None:
+    _write_objects(addresses, "address", "json.write_addresses",
+                   _file_path(path, file_name, extension, compression),
+                   pretty, compression)
 
 
+@metrics.timed("json.read_addresses")
 def read_addresses(path: str,
                    file_name: str = "addresses",
-                   extension: str = ".json") -> list[Address]:
-    with open(os.path.join(path, file_name + extension)) as file:
-        addresses = []
-        objects = json.load(file)
-        for obj in objects:
-            address = Address(
-                id=obj["id"],
-                street=obj["street"],
-                city=obj["city"],
-                country=obj["country"],
-                resident=obj.get("resident")  
-            )
-            addresses.append(address)
-        return addresses
+                   extension: str = ".json",
+                   compression: str | None = None) -> list[Address]:
+    return _read_objects("address", "json.read_addresses",
+                         _file_path(path, file_name, extension, compression),
+                         compression)
+
+
+def iter_addresses(path: str,
+                   file_name: str = "addresses",
+                   extension: str = ".json",
+                   compression: str | None = None,
+                   where: dict | None = None) -> Iterator[Address]:
+    return _iter_objects("address", _file_path(path, file_name, extension, compression),
+                         compression, where)
+
+
+@metrics.timed("json.write_relations")
+def write_relations(relations: Relations,
+                    path: str,
+                    file_name: str = "relations",
+                    extension: str = ".json",
+                    compression: str | None = None) -> None:
+    # tömör formátum: id listák és CSR tömbök, tagonkénti objektumok nélkül
+    file_path = _file_path(path, file_name, extension, compression)
+    with open_file(file_path, "w", compression) as file:
+        json.dump(relations.to_dict(), file, separators=(",", ":"))
+    metrics.count_file("json.write_relations.bytes", file_path)
+
+
+@metrics.timed("json.read_relations")
+def read_relations(path: str,
+                   file_name: str = "relations",
+                   extension: str = ".json",
+                   compression: str | None = None) -> Relations:
+    with open_file(_file_path(path, file_name, extension, compression), "r", compression) as file:
+        return Relations.from_dict(json.load(file))
 
 
 if __name__ == "__main__":
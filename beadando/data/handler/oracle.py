@@ -1,18 +1,43 @@
 from __future__ import annotations
 
-from typing import Any
+from collections.abc import Iterable
+from itertools import islice
+from time import perf_counter
+from typing import TYPE_CHECKING, Any
 
-try:
-    import oracledb  # type: ignore
-    from oracledb import Connection, DatabaseError  # type: ignore
-except ImportError:  # pragma: no cover
-    oracledb = None  # type: ignore
+from .. import metrics, schema
 
-    class Connection:  # type: ignore
-        pass
+if TYPE_CHECKING:
+    from oracledb import Connection  # type: ignore
 
-    class DatabaseError(Exception):  # type: ignore
-        pass
+
+class _MissingDatabaseError(Exception):
+    pass
+
+
+def _oracledb() -> Any:
+    # az oracledb csak az első tényleges használatkor töltődik be
+    try:
+        import oracledb  # type: ignore
+    except ImportError:  # pragma: no cover
+        return None
+    return oracledb
+
+
+def _database_error() -> type[Exception]:
+    module = _oracledb()
+    return module.DatabaseError if module is not None else _MissingDatabaseError
+
+
+def __getattr__(name: str) -> Any:
+    if name == "oracledb":
+        return _oracledb()
+    if name == "DatabaseError":
+        return _database_error()
+    if name == "Connection":
+        module = _oracledb()
+        return module.Connection if module is not None else object
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 
 def get_oracle_connection(
@@ -21,6 +46,7 @@ def get_oracle_connection(
     dsn: str,
     lib_dir: str | None = None,
 ) -> Connection:
+    oracledb = _oracledb()
     if oracledb is None:
         raise ImportError(
             "oracledb is not installed. Install it to use Oracle export."
@@ -36,18 +62,43 @@ def get_oracle_connection(
     )
 
 
+def _executemany(
+    cursor: Any,
+    statement: str,
+    rows: Iterable[tuple],
+    batch_size: int,
+    metric: str,
+) -> None:
+    # batch_size soronként építi és szúrja be a sorokat, így tetszőleges iterálható is streamelhető
+    rows = iter(rows)
+    total = 0
+    while True:
+        t0 = perf_counter()
+        batch = list(islice(rows, batch_size))
+        if not batch:
+            break
+        t1 = perf_counter()
+        metrics.add_time(metric + ".serialize", t1 - t0)
+        cursor.executemany(statement, batch)
+        metrics.observe(metric + ".executemany", perf_counter() - t1)
+        total += len(batch)
+    metrics.count(metric + ".rows", total)
+
+
+@metrics.timed("oracle.write_workplaces")
 def write_workplaces_oracle(
-    workplaces: list[Any],
+    workplaces: Iterable[Any],
     connection: Connection,
     table_name: str = "workplace",
     create: bool = True,
+    batch_size: int = 10_000,
 ) -> None:
     cursor = connection.cursor()
 
     if create:
         try:
             cursor.execute(f"DROP TABLE {table_name} CASCADE CONSTRAINTS PURGE")
-        except DatabaseError:
+        except _database_error():
             pass
 
         cursor.execute(
@@ -60,28 +111,35 @@ def write_workplaces_oracle(
             """
         )
 
-    cursor.executemany(
+    rows = map(schema.encoder("workplace", "oracle"), workplaces)
+    _executemany(
+        cursor,
         f"""
         INSERT INTO {table_name} (id, name, location)
         VALUES (:1, :2, :3)
         """,
-        [(w.id, w.name, w.location) for w in workplaces],
+        rows,
+        batch_size,
+        "oracle.write_workplaces",
     )
-    connection.commit()
+    with metrics.timer("oracle.write_workplaces.commit"):
+        connection.commit()
 
 
+@metrics.timed("oracle.write_addresses")
 def write_addresses_oracle(
-    addresses: list[Any],
+    addresses: Iterable[Any],
     connection: Connection,
     table_name: str = "address",
     create: bool = True,
+    batch_size: int = 10_000,
 ) -> None:
     cursor = connection.cursor()
 
     if create:
         try:
             cursor.execute(f"DROP TABLE {table_name} CASCADE CONSTRAINTS PURGE")
-        except DatabaseError:
+        except _database_error():
             pass
 
         cursor.execute(
@@ -95,28 +153,35 @@ def write_addresses_oracle(
             """
         )
 
-    cursor.executemany(
+    rows = map(schema.encoder("address", "oracle"), addresses)
+    _executemany(
+        cursor,
         f"""
         INSERT INTO {table_name} (id, street, city, country)
         VALUES (:1, :2, :3, :4)
         """,
-        [(a.id, a.street, a.city, a.country) for a in addresses],
+        rows,
+        batch_size,
+        "oracle.write_addresses",
     )
-    connection.commit()
+    with metrics.timer("oracle.write_addresses.commit"):
+        connection.commit()
 
 
+@metrics.timed("oracle.write_people")
 def write_people_oracle(
-    people: list[Any],
+    people: Iterable[Any],
     connection: Connection,
     table_name: str = "person",
     create: bool = True,
+    batch_size: int = 10_000,
 ) -> None:
     cursor = connection.cursor()
 
     if create:
         try:
             cursor.execute(f"DROP TABLE {table_name} CASCADE CONSTRAINTS PURGE")
-        except DatabaseError:
+        except _database_error():
             pass
 
         cursor.execute(
@@ -134,22 +199,17 @@ def write_people_oracle(
             """
         )
 
-    cursor.executemany(
+    rows = map(schema.encoder("person", "oracle"), people)
+    _executemany(
+        cursor,
         f"""
         INSERT INTO {table_name}
         (id, name, age, male, workplace_id, address_id)
         VALUES (:1, :2, :3, :4, :5, :6)
         """,
-        [
-            (
-                p.id,
-                p.name,
-                p.age,
-                int(p.male),
-                p.workplace.id if p.workplace else None,
-                p.address.id if p.address else None,
-            )
-            for p in people
-        ],
+        rows,
+        batch_size,
+        "oracle.write_people",
     )
-    connection.commit()
+    with metrics.timer("oracle.write_people.commit"):
+        connection.commit()
@@ -1,151 +1,145 @@
-import openpyxl
-from openpyxl import Workbook
+from __future__ import annotations
+
 import os
+from collections.abc import Iterable, Iterator
+from itertools import chain, islice
+from time import perf_counter
+from typing import TYPE_CHECKING
 
-from .. import generator
+from .. import metrics, schema
 from ..model_dataclasses import Person, Workplace, Address
 
-def write_people(people: list[Person],
-                 workbook: openpyxl.Workbook,
-                 sheet_name: str = "people",
-                 heading: bool = True) -> None:
-    sheet = workbook.create_sheet(sheet_name if sheet_name is not None else "people")
+if TYPE_CHECKING:
+    import openpyxl
+
+
+BATCH_SIZE = 1000
+
+
+def _write_rows(objects: Iterable,
+                entity: str,
+                metric: str,
+                workbook: openpyxl.Workbook,
+                sheet_name: str,
+                heading: bool) -> None:
+    sheet = workbook.create_sheet(sheet_name)
 
+    # sheet.append a write_only munkafüzetekkel is működik (streamelt írás)
     if heading:
-        field_names = ["id", "name", "age", "male", "address"]
-        for col in range(len(field_names)):
-            sheet.cell(row=1, column=col + 1, value=field_names[col])
+        sheet.append(schema.get_schema(entity).columns("xlsx"))
+
+    # batch-enként: encode (cellaértékek) és write (sheet.append: XML + temp fájl, hisztogram)
+    encode = schema.encoder(entity, "xlsx")
+    objects = iter(objects)
+    rows = 0
+    while batch := list(islice(objects, BATCH_SIZE)):
+        t0 = perf_counter()
+        batch = list(map(encode, batch))
+        t1 = perf_counter()
+        for row in batch:
+            sheet.append(row)
+        metrics.add_time(metric + ".encode", t1 - t0)
+        metrics.observe(metric + ".write", perf_counter() - t1)
+        rows += len(batch)
+    metrics.count(metric + ".rows", rows)
+
+
+def _iter_rows(entity: str,
+               workbook: openpyxl.Workbook,
+               sheet_name: str,
+               where: dict | None = None) -> Iterator:
+    rows = workbook[sheet_name].iter_rows(values_only=True)
+    first = next(rows, None)
+    if first is None:
+        return
+
+    # fejléc nélküli lapnál a séma oszlopsorrendje az alapértelmezett
+    if first[0] == "id":
+        columns = tuple(first)
+    else:
+        columns = schema.get_schema(entity).columns("xlsx")
+        rows = chain((first,), rows)
+    decode = schema.decoder(entity, "xlsx", columns)
+    keep = schema.row_filter(entity, "xlsx", where, columns) if where else None
+
+    for row in rows:
+        if row[0] is None:
+            break
+        if keep is None or keep(row):
+            yield decode(row)
+
+
+def _read_rows(entity: str,
+               metric: str,
+               workbook: openpyxl.Workbook,
+               sheet_name: str) -> list:
+    objects = list(_iter_rows(entity, workbook, sheet_name))
+    metrics.count(metric + ".rows", len(objects))
+    return objects
+
 
-    offset = 2 if heading else 1
-    for row in range(len(people)):
-        sheet.cell(row=row + offset, column=1, value=people[row].id)
-        sheet.cell(row=row + offset, column=2, value=people[row].name)
-        sheet.cell(row=row + offset, column=3, value=people[row].age)
-        sheet.cell(row=row + offset, column=4, value=people[row].male)
-        sheet.cell(row=row + offset, column=5, value=people[row].address.id if people[row].address else "")
+@metrics.timed("xlsx.write_people")
+def write_people(people: Iterable[Person],
+                 workbook: openpyxl.Workbook,
+                 sheet_name: str = "people",
+                 heading: bool = True) -> None:
+    _write_rows(people, "person", "xlsx.write_people", workbook,
+                sheet_name if sheet_name is not None else "people", heading)
 
 
+@metrics.timed("xlsx.read_people")
 def read_people(workbook: openpyxl.Workbook,
                 sheet_name: str = "people") -> list[Person]:
-    sheet = workbook[sheet_name]
-
-    people = []
-    row = 1
-    
-    if sheet.cell(row=1, column=1).value == "id":
-        row = 2
-    
-    while True:
-        if sheet.cell(row=row, column=1).value is None:
-            break
-        address_id = sheet.cell(row=row, column=5).value if sheet.max_column >= 5 else None
-        person = Person(
-            id=sheet.cell(row=row, column=1).value,
-            name=sheet.cell(row=row, column=2).value,
-            age=int(sheet.cell(row=row, column=3).value),
-            male=bool(sheet.cell(row=row, column=4).value),
-            address=address_id if address_id else None
-        )
-        row += 1
-        people.append(person)
-    return people
+    return _read_rows("person", "xlsx.read_people", workbook, sheet_name)
+
 
+def iter_people(workbook: openpyxl.Workbook,
+                sheet_name: str = "people",
+                where: dict | None = None) -> Iterator[Person]:
+    # read_only munkafüzettel soronként olvas; where: mező -> predikátum
+    return _iter_rows("person", workbook, sheet_name, where)
 
-def write_workplaces(workplaces: list[Workplace],
+
+@metrics.timed("xlsx.write_workplaces")
+def write_workplaces(workplaces: Iterable[Workplace],
                      workbook: openpyxl.Workbook,
                      sheet_name: str = "workplaces",
                      heading: bool = True) -> None:
-    sheet = workbook.create_sheet(sheet_name if sheet_name is not None else "workplaces")
-
-    if heading:
-        field_names = ["id", "name", "location", "employees"]
-        for col in range(len(field_names)):
-            sheet.cell(row=1, column=col + 1, value=field_names[col])
-
-    offset = 2 if heading else 1
-    for row in range(len(workplaces)):
-        sheet.cell(row=row + offset, column=1, value=workplaces[row].id)
-        sheet.cell(row=row + offset, column=2, value=workplaces[row].name)
-        sheet.cell(row=row + offset, column=3, value=workplaces[row].location)
-        employees_str = ",".join(workplaces[row].employees) if workplaces[row].employees else ""
-        sheet.cell(row=row + offset, column=4, value=employees_str)
+    _write_rows(workplaces, "workplace", "xlsx.write_workplaces", workbook,
+                sheet_name if sheet_name is not None else "workplaces", heading)
 
 
+@metrics.timed("xlsx.read_workplaces")
 def read_workplaces(workbook: openpyxl.Workbook,
                     sheet_name: str = "workplaces") -> list[Workplace]:
-    sheet = workbook[sheet_name]
+    return _read_rows("workplace", "xlsx.read_workplaces", workbook, sheet_name)
 
-    workplaces = []
-    row = 1
 
-    if sheet.cell(row=1, column=1).value == "id":
-        row = 2
-    
-    while True:
-        if sheet.cell(row=row, column=1).value is None:
-            break
-        
-        employees_str = sheet.cell(row=row, column=4).value
-        employees = employees_str.split(",") if employees_str else []
-        employees = [emp.strip() for emp in employees if emp.strip()]
-        
-        workplace = Workplace(
-            id=sheet.cell(row=row, column=1).value,
-            name=sheet.cell(row=row, column=2).value,
-            location=sheet.cell(row=row, column=3).value,
-            employees=employees
-        )
-        row += 1
-        workplaces.append(workplace)
-    return workplaces
+def iter_workplaces(workbook: openpyxl.Workbook,
+                    sheet_name: str = "workplaces",
+                    where: dict | None = None) -> Iterator[Workplace]:
+    return _iter_rows("workplace", workbook, sheet_name, where)
 
 
-def write_addresses(addresses: list[Address],
+@metrics.timed("xlsx.write_addresses")
+def write_addresses(addresses: Iterable[Address],
                     workbook: openpyxl.Workbook,
                     sheet_name: str = "addresses",
                     heading: bool = True) -> None:
-    sheet = workbook.create_sheet(sheet_name if sheet_name is not None else "addresses")
-
-    if heading:
-        field_names = ["id", "street", "city", "country", "resident"]
-        for col in range(len(field_names)):
-            sheet.cell(row=1, column=col + 1, value=field_names[col])
-
-    offset = 2 if heading else 1
-    for row in range(len(addresses)):
-        sheet.cell(row=row + offset, column=1, value=addresses[row].id)
-        sheet.cell(row=row + offset, column=2, value=addresses[row].street)
-        sheet.cell(row=row + offset, column=3, value=addresses[row].city)
-        sheet.cell(row=row + offset, column=4, value=addresses[row].country)
-        sheet.cell(row=row + offset, column=5, value=addresses[row].resident.id if addresses[row].resident else "")
+    _write_rows(addresses, "address", "xlsx.write_addresses", workbook,
+                sheet_name if sheet_name is not None else "addresses", heading)
 
 
+@metrics.timed("xlsx.read_addresses")
 def read_addresses(workbook: openpyxl.Workbook,
                    sheet_name: str = "addresses") -> list[Address]:
-    sheet = workbook[sheet_name]
-
-    addresses = []
-    row = 1
-    
-    if sheet.cell(row=1, column=1).value == "id":
-        row = 2
-    
-    while True:
-        if sheet.cell(row=row, column=1).value is None:
-            break
-        
-        resident_id = sheet.cell(row=row, column=5).value if sheet.max_column >= 5 else None
-        
-        address = Address(
-            id=sheet.cell(row=row, column=1).value,
-            street=sheet.cell(row=row, column=2).value,
-            city=sheet.cell(row=row, column=3).value,
-            country=sheet.cell(row=row, column=4).value,
-            resident=resident_id if resident_id else None
-        )
-        row += 1
-        addresses.append(address)
-    return addresses
+    return _read_rows("address", "xlsx.read_addresses", workbook, sheet_name)
+
+
+def iter_addresses(workbook: openpyxl.Workbook,
+                   sheet_name: str = "addresses",
+                   where: dict | None = None) -> Iterator[Address]:
+    return _iter_rows("address", workbook, sheet_name, where)
 
 
 if __name__ == "__main__":
@@ -153,6 +147,8 @@ if __name__ == "__main__":
     from data.generator import generate_people, generate_workplaces, generate_addresses
 
     try:
+        import openpyxl
+
         # Teszt könyvtár létrehozása
         test_dir = os.path.join(
             os.path.dirname(os.path.dirname(os.path.dirname(__file__))),
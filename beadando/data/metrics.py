@@ -0,0 +1,214 @@
+import functools
+import os
+import threading
+from contextlib import contextmanager, nullcontext
+from time import perf_counter
+
+
+# másodpercben, a hisztogramok felső határai
+BUCKETS = (0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0, 10.0, float("inf"))
+
+_enabled = False
+_callbacks = []
+_NULL_TIMER = nullcontext()
+
+
+class Histogram:
+    def __init__(self, buckets: tuple[float, ...] = BUCKETS) -> None:
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.count = 0
+        self.total = 0.0
+        self.min = float("inf")
+        self.max = 0.0
+
+    def observe(self, value: float) -> None:
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[i] += 1
+                break
+        self.count += 1
+        self.total += value
+        self.min = min(self.min, value)
+        self.max = max(self.max, value)
+
+    def merge(self, data: dict) -> None:
+        # egy másik registry to_dict() alakú hisztogramja (pl. worker folyamatból)
+        for i, bound in enumerate(self.buckets):
+            self.counts[i] += data["buckets"].get(str(bound), 0)
+        self.count += data["count"]
+        self.total += data["sum"]
+        if data["count"]:
+            self.min = min(self.min, data["min"])
+            self.max = max(self.max, data["max"])
+
+    def to_dict(self) -> dict:
+        return {
+            "count": self.count,
+            "sum": self.total,
+            "min": self.min if self.count else None,
+            "max": self.max if self.count else None,
+            "buckets": {str(bound): n for bound, n in zip(self.buckets, self.counts)},
+        }
+
+
+class Registry:
+    def __init__(self) -> None:
+        self.lock = threading.Lock()
+        self.reset()
+
+    def reset(self) -> None:
+        self.timers = {}
+        self.counters = {}
+        self.histograms = {}
+
+    def add_time(self, name: str, seconds: float) -> None:
+        with self.lock:
+            count, total = self.timers.get(name, (0, 0.0))
+            self.timers[name] = (count + 1, total + seconds)
+
+    def count(self, name: str, n: int = 1) -> None:
+        with self.lock:
+            self.counters[name] = self.counters.get(name, 0) + n
+
+    def observe(self, name: str, value: float) -> None:
+        with self.lock:
+            if name not in self.histograms:
+                self.histograms[name] = Histogram()
+            self.histograms[name].observe(value)
+
+    def merge(self, snapshot: dict) -> None:
+        with self.lock:
+            for name, timer in snapshot["timers"].items():
+                count, total = self.timers.get(name, (0, 0.0))
+                self.timers[name] = (count + timer["count"], total + timer["seconds"])
+            for name, n in snapshot["counters"].items():
+                self.counters[name] = self.counters.get(name, 0) + n
+            for name, data in snapshot["histograms"].items():
+                if name not in self.histograms:
+                    self.histograms[name] = Histogram()
+                self.histograms[name].merge(data)
+
+    def snapshot(self) -> dict:
+        with self.lock:
+            return {
+                "timers": {name: {"count": c, "seconds": s} for name, (c, s) in self.timers.items()},
+                "counters": dict(self.counters),
+                "histograms": {name: h.to_dict() for name, h in self.histograms.items()},
+            }
+
+
+registry = Registry()
+
+
+def enable(callback=None, reset: bool = True) -> None:
+    global _enabled
+    if reset:
+        registry.reset()
+    if callback is not None:
+        add_callback(callback)
+    _enabled = True
+
+
+def disable() -> None:
+    global _enabled
+    _enabled = False
+
+
+def enabled() -> bool:
+    return _enabled
+
+
+def add_callback(callback) -> None:
+    # callback(kind, name, value), ahol kind: "time", "count" vagy "observe"
+    _callbacks.append(callback)
+
+
+def remove_callback(callback) -> None:
+    _callbacks.remove(callback)
+
+
+def snapshot() -> dict:
+    return registry.snapshot()
+
+
+def merge(snapshot: dict) -> None:
+    # más folyamatban gyűjtött snapshot hozzáadása (a callbackek nem hívódnak újra)
+    if _enabled:
+        registry.merge(snapshot)
+
+
+def add_time(name: str, seconds: float) -> None:
+    if not _enabled:
+        return
+    registry.add_time(name, seconds)
+    for callback in _callbacks:
+        callback("time", name, seconds)
+
+
+def count(name: str, n: int = 1) -> None:
+    if not _enabled:
+        return
+    registry.count(name, n)
+    for callback in _callbacks:
+        callback("count", name, n)
+
+
+def observe(name: str, value: float) -> None:
+    if not _enabled:
+        return
+    registry.observe(name, value)
+    for callback in _callbacks:
+        callback("observe", name, value)
+
+
+def count_file(name: str, path: str) -> None:
+    if _enabled:
+        count(name, os.path.getsize(path))
+
+
+class _Timer:
+    __slots__ = ("name", "start")
+
+    def __init__(self, name: str) -> None:
+        self.name = name
+
+    def __enter__(self) -> "_Timer":
+        self.start = perf_counter()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        add_time(self.name, perf_counter() - self.start)
+
+
+def timer(name: str):
+    return _Timer(name) if _enabled else _NULL_TIMER
+
+
+def timed(name: str):
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not _enabled:
+                return func(*args, **kwargs)
+            with _Timer(name):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+@contextmanager
+def profile(path: str | None = None, sort: str = "cumulative", limit: int = 30):
+    import cProfile
+    import pstats
+
+    profiler = cProfile.Profile()
+    profiler.enable()
+    try:
+        yield profiler
+    finally:
+        profiler.disable()
+        if path:
+            profiler.dump_stats(path)
+        else:
+            pstats.Stats(profiler).sort_stats(sort).print_stats(limit)
@@ -0,0 +1,216 @@
+import os
+import re
+from collections.abc import Callable, Iterable, Iterator
+from concurrent.futures import ThreadPoolExecutor
+from itertools import chain, groupby, islice
+from operator import itemgetter
+from urllib.parse import unquote
+
+from . import extsort, metrics, schema
+from ._feed import Feed
+from .handler._formats import FORMATS, iter_objects, write_objects
+from .model_dataclasses import Person
+
+
+AGE_BUCKET = 10
+# Hive konvenció a hiányzó értékre (pl. beolvasott embernél a cím csak id, a város nem ismert)
+NULL = "__HIVE_DEFAULT_PARTITION__"
+# ennyi partíció lehet egyszerre nyitva közvetlen (rendezés nélküli) írásnál
+MAX_OPEN = 256
+WORKERS = 4
+BATCH_SIZE = 1000
+# fájl- és könyvtárnévben nem biztonságos karakterek, %XX alakban kerülnek a névbe
+_UNSAFE = re.compile(r'[\x00-\x1f"#%\'*/:=?\\\x7f{\[\]^]')
+
+
+def age_bucket(age: int, width: int = AGE_BUCKET) -> str:
+    low = age // width * width
+    return f"{low}-{low + width - 1}"
+
+
+def _address_field(name: str) -> Callable[[Person], str | None]:
+    def value(person: Person) -> str | None:
+        address = person.address
+        if address is None or address.__class__ is str:
+            return None
+        return getattr(address, name)
+    return value
+
+
+PARTITION_KEYS = {
+    "city": _address_field("city"),
+    "country": _address_field("country"),
+    "age": lambda person: age_bucket(person.age),
+}
+# kevés, előre ismert értékű kulcsok: rendezés nélkül, partíciónként egy nyitott íróval
+BOUNDED_KEYS = ("age",)
+
+
+def escape(value) -> str:
+    if value is None or value == "":
+        return NULL
+    return _UNSAFE.sub(lambda match: f"%{ord(match.group()):02X}", str(value))
+
+
+def unescape(value: str) -> str | None:
+    return None if value == NULL else unquote(value)
+
+
+def partition_name(key: str, value) -> str:
+    return f"{key}={escape(value)}"
+
+
+class _Writers:
+    # partíciónként saját író (saját fájlkezelővel) egy szálkészletben, korlátos sorral táplálva
+    def __init__(self, path: str, fmt: str, compression: str | None, workers: int) -> None:
+        self.path = path
+        self.fmt = fmt
+        self.compression = compression
+        self.executor = ThreadPoolExecutor(max_workers=workers)
+        self.feeds: dict[str, Feed] = {}
+
+    def open(self, name: str) -> Feed:
+        directory = os.path.join(self.path, name)
+        os.makedirs(directory, exist_ok=True)
+        feed = Feed()
+        feed.future = self.executor.submit(write_objects, feed, self.fmt, directory,
+                                           "person", self.compression)
+        self.feeds[name] = feed
+        return feed
+
+    def close(self) -> None:
+        try:
+            for feed in self.feeds.values():
+                if not feed.future.done():
+                    feed.close()
+        finally:
+            self.executor.shutdown(wait=True)
+        for feed in self.feeds.values():
+            feed.future.result()
+
+
+def _write_direct(people: Iterable[Person], writers: _Writers, by: str,
+                  counts: dict[str, int], max_open: int) -> None:
+    key = PARTITION_KEYS[by]
+    buffers: dict[str, list] = {}
+    for person in people:
+        name = partition_name(by, key(person))
+        buffer = buffers.get(name)
+        if buffer is None:
+            if len(buffers) >= max_open:
+                raise ValueError(f"more than {max_open} partitions for {by!r}")
+            writers.open(name)
+            buffer = buffers[name] = []
+            counts[name] = 0
+        buffer.append(person)
+        counts[name] += 1
+        if len(buffer) >= BATCH_SIZE:
+            writers.feeds[name].put(buffer)
+            buffers[name] = []
+    for name, buffer in buffers.items():
+        if buffer:
+            writers.feeds[name].put(buffer)
+
+
+def _write_sorted(people: Iterable[Person], writers: _Writers, by: str,
+                  counts: dict[str, int], sort_by: str | None, tmp_dir: str | None) -> None:
+    # partíció szerint (azon belül opcionálisan sort_by szerint) külső rendezés, majd csoportonként
+    # egy író: egyszerre csak a készlet méretének megfelelő partíció van nyitva
+    key = PARTITION_KEYS[by]
+    order = extsort.sort_key("person", sort_by) if sort_by is not None else None
+    encode = schema.encoder("person", "pickle")
+    decode = schema.decoder("person", "pickle")
+    rows = ((partition_name(by, key(p)), order(p) if order else None, encode(p)) for p in people)
+    with metrics.timer("partition.sort"):
+        rows = extsort.external_sort(rows, itemgetter(0, 1) if order else itemgetter(0),
+                                     run_size=extsort.OBJECT_RUN_SIZE, tmp_dir=tmp_dir)
+    for name, group in groupby(rows, itemgetter(0)):
+        feed = writers.open(name)
+        count = 0
+        while batch := [decode(row) for _, _, row in islice(group, BATCH_SIZE)]:
+            feed.put(batch)
+            count += len(batch)
+        counts[name] = count
+        feed.close()
+
+
+def write_partitioned(people: Iterable[Person],
+                      path: str,
+                      by: str = "city",
+                      fmt: str = "csv",
+                      compression: str | None = None,
+                      sort: bool | None = None,
+                      sort_by: str | None = None,
+                      workers: int = WORKERS,
+                      max_open: int = MAX_OPEN,
+                      tmp_dir: str | None = None) -> dict[str, int]:
+    # <path>/<by>=<érték>/people.<ext>; visszaadja a partíciónkénti sorszámot
+    if by not in PARTITION_KEYS:
+        raise ValueError(f"Unknown partition key: {by!r}, choose from {', '.join(PARTITION_KEYS)}")
+    if fmt not in FORMATS:
+        raise ValueError(f"Unknown format: {fmt!r}")
+    if sort is None:
+        sort = by not in BOUNDED_KEYS or sort_by is not None
+
+    os.makedirs(path, exist_ok=True)
+    counts: dict[str, int] = {}
+    if sort:
+        writers = _Writers(path, fmt, compression, workers)
+    else:
+        # minden partíció írója végig nyitva van, ezért mindegyiknek saját szál jut
+        writers = _Writers(path, fmt, compression, max_open)
+    try:
+        if sort:
+            _write_sorted(people, writers, by, counts, sort_by, tmp_dir)
+        else:
+            _write_direct(people, writers, by, counts, max_open)
+    finally:
+        writers.close()
+    metrics.count("partition.write.partitions", len(counts))
+    return counts
+
+
+def _matches(condition, value: str | None) -> bool:
+    if callable(condition):
+        return condition(value)
+    if condition is None or isinstance(condition, str):
+        return value == condition
+    return value in condition
+
+
+def partitions(path: str, where: dict | None = None) -> list[tuple[str, str | None, str]]:
+    # (kulcs, érték, könyvtár) a feltételnek megfelelő partíciókra; a where érték lehet
+    # egy érték, értékek halmaza vagy az értékre hívott függvény
+    result = []
+    for name in sorted(os.listdir(path)):
+        directory = os.path.join(path, name)
+        if "=" not in name or not os.path.isdir(directory):
+            continue
+        key, _, raw = name.partition("=")
+        value = unescape(raw)
+        if where:
+            unknown = set(where) - {key}
+            if unknown:
+                raise ValueError(f"{path} is partitioned by {key!r}, not by {', '.join(sorted(unknown))}")
+            if not _matches(where[key], value):
+                continue
+        result.append((key, value, directory))
+    return result
+
+
+def iter_partitioned(path: str,
+                     fmt: str = "csv",
+                     where: dict | None = None,
+                     compression: str | None = None) -> Iterator[Person]:
+    # csak a where-nek megfelelő partíciók fájljait nyitja meg (partition pruning)
+    matching = partitions(path, where)
+    metrics.count("partition.read.partitions", len(matching))
+    return chain.from_iterable(iter_objects(fmt, directory, "person", compression)
+                               for _, _, directory in matching)
+
+
+def read_partitioned(path: str,
+                     fmt: str = "csv",
+                     where: dict | None = None,
+                     compression: str | None = None) -> list[Person]:
+    return list(iter_partitioned(path, fmt, where, compression))
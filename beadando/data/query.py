@@ -0,0 +1,238 @@
+from bisect import bisect_left, bisect_right
+from collections.abc import Callable, Iterable, Iterator
+from dataclasses import dataclass
+from operator import attrgetter
+
+from . import metrics, schema
+from .handler._formats import iter_objects
+from .model_dataclasses import Person, Workplace, Address
+
+
+# hash index: érték -> pozíciók; rendezett index: tartomány-lekérdezéshez (bisect)
+HASHED = {
+    "person": ("id", "male", "workplace", "address", "city", "country"),
+    "workplace": ("id", "location"),
+    "address": ("id", "city", "country", "resident"),
+}
+SORTED = {
+    "person": ("age",),
+    "workplace": (),
+    "address": (),
+}
+# származtatott mezők: az ember városa / országa a címéből jön
+DERIVED = {
+    "person": {"city": ("address", "city"), "country": ("address", "country")},
+    "workplace": {},
+    "address": {},
+}
+ENTITIES = ("person", "workplace", "address")
+
+
+@dataclass(frozen=True)
+class Range:
+    low: object = None
+    high: object = None
+
+    def __contains__(self, value) -> bool:
+        # zárt intervallum, a hiányzó határ nem korlátoz
+        return (value is not None
+                and (self.low is None or value >= self.low)
+                and (self.high is None or value <= self.high))
+
+
+def between(low=None, high=None) -> Range:
+    return Range(low, high)
+
+
+def _predicate(condition) -> Callable[[object], bool]:
+    # érték: egyenlőség, Range: tartomány, halmaz / lista: tagság, függvény: tetszőleges feltétel
+    if isinstance(condition, Range):
+        return condition.__contains__
+    if callable(condition):
+        return condition
+    if isinstance(condition, (set, frozenset, list, tuple)):
+        return frozenset(condition).__contains__
+    return lambda value: value == condition
+
+
+def _ref(value) -> str | None:
+    if value is None or value.__class__ is str:
+        return value
+    return value.id
+
+
+class Dataset:
+    # betöltött objektumok fölötti indexek; minden index az első használatkor épül, utána újrahasznosul
+    def __init__(self,
+                 people: Iterable[Person] = (),
+                 workplaces: Iterable[Workplace] = (),
+                 addresses: Iterable[Address] = ()) -> None:
+        self.objects = {
+            "person": list(people),
+            "workplace": list(workplaces),
+            "address": list(addresses),
+        }
+        self._hash: dict[tuple[str, str], dict] = {}
+        self._sorted: dict[tuple[str, str], tuple[list, list[int]]] = {}
+
+    @classmethod
+    def load(cls, path: str, fmt: str = "csv", compression: str | None = None) -> "Dataset":
+        return cls(*(iter_objects(fmt, path, entity, compression) for entity in ENTITIES))
+
+    @property
+    def people(self) -> "Query":
+        return Query(self, "person")
+
+    @property
+    def workplaces(self) -> "Query":
+        return Query(self, "workplace")
+
+    @property
+    def addresses(self) -> "Query":
+        return Query(self, "address")
+
+    def query(self, entity: str) -> "Query":
+        return Query(self, schema.get_schema(entity).name)
+
+    def get(self, entity: str, id: str):
+        positions = self.hash_index(entity, "id").get(id)
+        return self.objects[entity][positions[0]] if positions else None
+
+    def getter(self, entity: str, field: str) -> Callable:
+        derived = DERIVED[entity].get(field)
+        if derived is not None:
+            ref, name = derived
+            get_ref = self.getter(entity, ref)
+
+            def value(obj):
+                other = self.get(ref, id) if (id := get_ref(obj)) is not None else None
+                return getattr(other, name) if other is not None else None
+            return value
+        fields = {f.name: f for f in schema.get_schema(entity).fields}
+        if field not in fields:
+            raise KeyError(f"Unknown field {field!r} for {entity}")
+        if fields[field].ref and not fields[field].many:
+            get = attrgetter(field)
+            return lambda obj: _ref(get(obj))
+        return attrgetter(field)
+
+    def hash_index(self, entity: str, field: str) -> dict:
+        index = self._hash.get((entity, field))
+        if index is None:
+            with metrics.timer("query.index.hash"):
+                index = {}
+                get = self.getter(entity, field)
+                for position, obj in enumerate(self.objects[entity]):
+                    index.setdefault(get(obj), []).append(position)
+            self._hash[(entity, field)] = index
+        return index
+
+    def sorted_index(self, entity: str, field: str) -> tuple[list, list[int]]:
+        index = self._sorted.get((entity, field))
+        if index is None:
+            with metrics.timer("query.index.sorted"):
+                get = self.getter(entity, field)
+                pairs = sorted((value, position)
+                               for position, obj in enumerate(self.objects[entity])
+                               if (value := get(obj)) is not None)
+                index = ([value for value, _ in pairs], [position for _, position in pairs])
+            self._sorted[(entity, field)] = index
+        return index
+
+
+class Query:
+    # lusta lekérdezés: a feltételek csak bejáráskor értékelődnek ki, az eredmény pozíciói gyorsítótárba kerülnek
+    def __init__(self, dataset: Dataset, entity: str, conditions: tuple = ()) -> None:
+        self.dataset = dataset
+        self.entity = entity
+        self.conditions = conditions
+        self._positions: list[int] | None = None
+
+    def where(self, **conditions) -> "Query":
+        return Query(self.dataset, self.entity, self.conditions + tuple(conditions.items()))
+
+    def _index_lookup(self, field: str, condition) -> set[int] | None:
+        dataset = self.dataset
+        # None egyenlőségként értendő; a rendezett index nem tartalmazza, így hash index vagy szűrés jön
+        if field in SORTED[self.entity] and condition is not None and not callable(condition) \
+                and not isinstance(condition, (set, frozenset, list, tuple)):
+            low, high = ((condition.low, condition.high) if isinstance(condition, Range)
+                         else (condition, condition))
+            values, positions = dataset.sorted_index(self.entity, field)
+            start = 0 if low is None else bisect_left(values, low)
+            end = len(values) if high is None else bisect_right(values, high)
+            return set(positions[start:end])
+        if field in HASHED[self.entity] and not callable(condition) \
+                and not isinstance(condition, Range):
+            index = dataset.hash_index(self.entity, field)
+            values = condition if isinstance(condition, (set, frozenset, list, tuple)) else (condition,)
+            result = set()
+            for value in values:
+                result.update(index.get(value, ()))
+            return result
+        return None
+
+    def positions(self) -> list[int]:
+        if self._positions is None:
+            candidates = []
+            rest = []
+            for field, condition in self.conditions:
+                found = self._index_lookup(field, condition)
+                if found is None:
+                    rest.append((self.dataset.getter(self.entity, field), _predicate(condition)))
+                else:
+                    candidates.append(found)
+            if candidates:
+                # a legkisebb halmazzal kezdve metszünk
+                candidates.sort(key=len)
+                selected = candidates[0].intersection(*candidates[1:])
+                positions = sorted(selected)
+            else:
+                positions = range(len(self.dataset.objects[self.entity]))
+            objects = self.dataset.objects[self.entity]
+            self._positions = [position for position in positions
+                               if all(test(get(objects[position])) for get, test in rest)]
+            metrics.count("query.rows", len(self._positions))
+        return self._positions
+
+    def __iter__(self) -> Iterator:
+        objects = self.dataset.objects[self.entity]
+        return (objects[position] for position in self.positions())
+
+    def count(self) -> int:
+        return len(self.positions())
+
+    def first(self):
+        return next(iter(self), None)
+
+    def ids(self) -> list[str]:
+        return [obj.id for obj in self]
+
+    def all(self) -> list:
+        return list(self)
+
+
+def scan(path: str,
+         entity: str = "person",
+         fmt: str = "csv",
+         compression: str | None = None,
+         **conditions) -> Iterator:
+    # lekérdezés betöltés nélkül: a feltételek az olvasóba kerülnek, csak az illeszkedő sorokból lesz objektum;
+    # származtatott mezőnél (pl. az ember városa) előbb a címeket szűri, majd id-halmazzal az embereket
+    entity = schema.get_schema(entity).name
+    where = {}
+    joins: dict[str, dict] = {}
+    for field, condition in conditions.items():
+        derived = DERIVED[entity].get(field)
+        if derived is not None:
+            ref, name = derived
+            joins.setdefault(ref, {})[name] = _predicate(condition)
+        else:
+            where[field] = _predicate(condition)
+    for ref, ref_where in joins.items():
+        with metrics.timer("query.scan.join"):
+            ids = frozenset(obj.id for obj in iter_objects(fmt, path, ref, compression, ref_where))
+        previous = where.get(ref)
+        where[ref] = (ids.__contains__ if previous is None
+                      else lambda value, previous=previous, ids=ids: value in ids and previous(value))
+    return iter_objects(fmt, path, entity, compression, where)
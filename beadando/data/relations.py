@@ -0,0 +1,170 @@
+from array import array
+from collections.abc import Iterable, Sequence
+from dataclasses import dataclass, field
+
+from .model_dataclasses import Person, Workplace, Address
+
+
+# 64 bites előjeles egész; -1 jelzi, ha egy elemnek nincs sora (pl. munkahely nélküli ember)
+TYPECODE = "q"
+RELATIONS = ("employees", "residents")
+
+
+class CSR:
+    # compressed sparse row: a sor szomszédai indices[offsets[row]:offsets[row + 1]]
+    __slots__ = ("offsets", "indices")
+
+    def __init__(self, offsets: array, indices: array) -> None:
+        assert len(offsets) >= 1 and offsets[0] == 0 and offsets[-1] == len(indices)
+        self.offsets = offsets
+        self.indices = indices
+
+    @classmethod
+    def from_rows(cls, n_rows: int, row_of: Sequence[int]) -> "CSR":
+        # row_of[j] = a j. elem sora (vagy -1); két menetes counting sort, O(n + n_rows)
+        counts = array(TYPECODE, bytes(8 * (n_rows + 1)))
+        for row in row_of:
+            if row >= 0:
+                counts[row + 1] += 1
+        for row in range(n_rows):
+            counts[row + 1] += counts[row]
+        offsets = array(TYPECODE, counts)
+        indices = array(TYPECODE, bytes(8 * offsets[-1]))
+        for item, row in enumerate(row_of):
+            if row >= 0:
+                indices[counts[row]] = item
+                counts[row] += 1
+        return cls(offsets, indices)
+
+    @classmethod
+    def from_lists(cls, lists: Iterable[Iterable[int]]) -> "CSR":
+        offsets = array(TYPECODE, [0])
+        indices = array(TYPECODE)
+        for items in lists:
+            indices.extend(items)
+            offsets.append(len(indices))
+        return cls(offsets, indices)
+
+    def __len__(self) -> int:
+        return len(self.offsets) - 1
+
+    def __eq__(self, other) -> bool:
+        if not isinstance(other, CSR):
+            return NotImplemented
+        return self.offsets == other.offsets and self.indices == other.indices
+
+    def neighbours(self, row: int) -> memoryview:
+        # O(1), másolás nélküli nézet
+        return memoryview(self.indices)[self.offsets[row]:self.offsets[row + 1]]
+
+    def degree(self, row: int) -> int:
+        return self.offsets[row + 1] - self.offsets[row]
+
+    @property
+    def nbytes(self) -> int:
+        return (len(self.offsets) + len(self.indices)) * self.offsets.itemsize
+
+    def to_dict(self) -> dict:
+        return {"offsets": self.offsets.tolist(), "indices": self.indices.tolist()}
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "CSR":
+        return cls(array(TYPECODE, data["offsets"]), array(TYPECODE, data["indices"]))
+
+
+def _id(value) -> str | None:
+    if value is None:
+        return None
+    return value if isinstance(value, str) else value.id
+
+
+@dataclass
+class Relations:
+    people: list[str]
+    workplaces: list[str]
+    addresses: list[str]
+    employees: CSR   # munkahely -> emberek
+    residents: CSR   # cím -> lakók (egy címen több lakó is lehet)
+    _index: dict = field(default_factory=dict, init=False, repr=False, compare=False)
+
+    def _position(self, kind: str, id: str) -> int:
+        if kind not in self._index:
+            self._index[kind] = {value: i for i, value in enumerate(getattr(self, kind))}
+        return self._index[kind][id]
+
+    def employee_ids(self, workplace_id: str) -> list[str]:
+        people = self.people
+        return [people[i] for i in self.employees.neighbours(self._position("workplaces", workplace_id))]
+
+    def resident_ids(self, address_id: str) -> list[str]:
+        people = self.people
+        return [people[i] for i in self.residents.neighbours(self._position("addresses", address_id))]
+
+    def adjacency(self, relation: str) -> Iterable[tuple[str, list[str]]]:
+        # (sor id, tag id-k) párok a handler szerializálóknak
+        csr = getattr(self, relation)
+        rows = self.workplaces if relation == "employees" else self.addresses
+        people = self.people
+        for row, row_id in enumerate(rows):
+            yield row_id, [people[i] for i in csr.neighbours(row)]
+
+    def to_dict(self) -> dict:
+        return {
+            "people": self.people,
+            "workplaces": self.workplaces,
+            "addresses": self.addresses,
+            "employees": self.employees.to_dict(),
+            "residents": self.residents.to_dict(),
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "Relations":
+        return cls(
+            people=list(data["people"]),
+            workplaces=list(data["workplaces"]),
+            addresses=list(data["addresses"]),
+            employees=CSR.from_dict(data["employees"]),
+            residents=CSR.from_dict(data["residents"]),
+        )
+
+
+def build_relations(people: Sequence[Person],
+                    workplaces: Sequence[Workplace],
+                    addresses: Sequence[Address]) -> Relations:
+    workplace_ids = [w.id for w in workplaces]
+    address_ids = [a.id for a in addresses]
+    workplace_index = {id: i for i, id in enumerate(workplace_ids)}
+    address_index = {id: i for i, id in enumerate(address_ids)}
+
+    workplace_of = array(TYPECODE, (workplace_index.get(_id(p.workplace), -1) for p in people))
+    address_of = array(TYPECODE, (address_index.get(_id(p.address), -1) for p in people))
+    return Relations(
+        people=[p.id for p in people],
+        workplaces=workplace_ids,
+        addresses=address_ids,
+        employees=CSR.from_rows(len(workplace_ids), workplace_of),
+        residents=CSR.from_rows(len(address_ids), address_of),
+    )
+
+
+def from_adjacency(employees: Iterable[tuple[str, Iterable[str]]],
+                   residents: Iterable[tuple[str, Iterable[str]]]) -> Relations:
+    # (sor id, tag id-k) párokból; az emberek sorrendje az első előfordulásuk sorrendje
+    people: dict[str, int] = {}
+    ids = {}
+    csrs = {}
+    for relation, pairs in zip(RELATIONS, (employees, residents)):
+        rows = []
+        lists = []
+        for row_id, members in pairs:
+            rows.append(row_id)
+            lists.append([people.setdefault(member, len(people)) for member in members])
+        ids[relation] = rows
+        csrs[relation] = CSR.from_lists(lists)
+    return Relations(
+        people=list(people),
+        workplaces=ids["employees"],
+        addresses=ids["residents"],
+        employees=csrs["employees"],
+        residents=csrs["residents"],
+    )
@@ -0,0 +1,175 @@
+from dataclasses import dataclass, fields
+from functools import lru_cache
+
+from .model_dataclasses import Person, Workplace, Address
+
+
+FORMATS = ("csv", "json", "xlsx", "oracle", "pickle")
+# natív típusokat tartó formátumok (nincs szöveges konverzió)
+NATIVE = ("json", "pickle")
+
+
+@dataclass(frozen=True)
+class Field:
+    name: str
+    type: type = str
+    ref: bool = False      # másik entitás (vagy csak annak id-ja)
+    many: bool = False     # id-k listája
+    inverse: bool = False  # visszafelé mutató kapcsolat (pl. employees), relációs táblában nincs oszlopa
+
+
+@dataclass(frozen=True)
+class Schema:
+    name: str
+    model: type
+    fields: tuple[Field, ...]
+
+    def __post_init__(self) -> None:
+        # a dekóderek pozíciósan hívják a konstruktort
+        assert tuple(f.name for f in fields(self.model)) == tuple(f.name for f in self.fields)
+
+    def columns(self, fmt: str = "csv") -> tuple[str, ...]:
+        return tuple(f.name for f in self._fields(fmt))
+
+    def _fields(self, fmt: str) -> tuple[Field, ...]:
+        if fmt not in FORMATS:
+            raise ValueError(f"Unknown format: {fmt!r}")
+        if fmt == "oracle":
+            return tuple(f for f in self.fields if not f.inverse)
+        return self.fields
+
+
+PERSON = Schema("person", Person, (
+    Field("id"),
+    Field("name"),
+    Field("age", int),
+    Field("male", bool),
+    Field("workplace", ref=True),
+    Field("address", ref=True),
+))
+
+WORKPLACE = Schema("workplace", Workplace, (
+    Field("id"),
+    Field("name"),
+    Field("location"),
+    Field("employees", ref=True, many=True, inverse=True),
+))
+
+ADDRESS = Schema("address", Address, (
+    Field("id"),
+    Field("street"),
+    Field("city"),
+    Field("country"),
+    Field("resident", ref=True, inverse=True),
+))
+
+SCHEMAS = {schema.name: schema for schema in (PERSON, WORKPLACE, ADDRESS)}
+
+
+def get_schema(entity: str | type) -> Schema:
+    if isinstance(entity, Schema):
+        return entity
+    for schema in SCHEMAS.values():
+        if entity == schema.name or entity is schema.model:
+            return schema
+    raise KeyError(f"Unknown entity: {entity!r}")
+
+
+def _encode_expr(field: Field, fmt: str) -> str:
+    value = f"obj.{field.name}"
+    if field.many:
+        ids = f"[e if e.__class__ is str else e.id for e in ({value} or ())]"
+        return ids if fmt in NATIVE else f'",".join({ids})'
+    if field.ref:
+        # a kapcsolat lehet objektum vagy (beolvasás után) csak id
+        expr = f"(None if (v := {value}) is None else v if v.__class__ is str else v.id)"
+        return f'({expr} or "")' if fmt in ("csv", "xlsx") else expr
+    if field.type is bool and fmt == "oracle":
+        return f"int({value})"
+    return value
+
+
+def _decode_expr(field: Field, fmt: str, src: str) -> str:
+    if field.many:
+        if fmt in NATIVE:
+            return f"list({src} or ())"
+        return f'[e.strip() for e in ({src} or "").split(",") if e.strip()]'
+    if field.ref:
+        return f"({src} or None)"
+    if fmt in NATIVE:
+        return src
+    if field.type is int:
+        return f"int({src})"
+    if field.type is bool:
+        return f'({src}.lower() == "true")' if fmt == "csv" else f"bool({src})"
+    return src
+
+
+def _compile(name: str, source: str, namespace: dict):
+    exec(compile(source, f"<schema {name}>", "exec"), namespace)
+    function = namespace[name]
+    function.__source__ = source
+    return function
+
+
+@lru_cache(maxsize=None)
+def encoder(entity: str, fmt: str):
+    # json: dict, minden más formátum (pickle is): tuple a columns(fmt) sorrendjében
+    schema = get_schema(entity)
+    exprs = [(f.name, _encode_expr(f, fmt)) for f in schema._fields(fmt)]
+    if fmt == "json":
+        body = "{" + ", ".join(f"{name!r}: {expr}" for name, expr in exprs) + "}"
+    else:
+        body = "(" + ", ".join(expr for _, expr in exprs) + ",)"
+    source = f"def encode_{schema.name}_{fmt}(obj):\n    return {body}\n"
+    return _compile(f"encode_{schema.name}_{fmt}", source, {})
+
+
+def row_filter(entity: str,
+               fmt: str,
+               where: dict,
+               columns: tuple[str, ...] | None = None):
+    # where: mezőnév -> a (dekódolt) mezőértékre hívott predikátum; a nyers soron fut,
+    # így a nem illeszkedő sorokból nem épül objektum (predicate pushdown az olvasókba)
+    schema = get_schema(entity)
+    if columns is None:
+        columns = schema.columns(fmt)
+    by_name = {f.name: f for f in schema.fields}
+    namespace = {}
+    terms = []
+    for i, (name, predicate) in enumerate(where.items()):
+        if name not in by_name:
+            raise KeyError(f"Unknown field {name!r} for {schema.name}")
+        if fmt == "json":
+            src = f"obj.get({name!r})"
+        elif name in columns:
+            src = f"obj[{columns.index(name)}]"
+        else:
+            src = "None"
+        namespace[f"p{i}"] = predicate
+        terms.append(f"p{i}({_decode_expr(by_name[name], fmt, src)})")
+    source = (f"def filter_{schema.name}_{fmt}(obj):\n"
+              f"    return {' and '.join(terms) or 'True'}\n")
+    return _compile(f"filter_{schema.name}_{fmt}", source, namespace)
+
+
+@lru_cache(maxsize=None)
+def decoder(entity: str, fmt: str, columns: tuple[str, ...] | None = None):
+    # json: dict -> model; más formátum: tuple (a columns sorrendjében, alapból a séma sorrendje) -> model
+    schema = get_schema(entity)
+    if columns is None:
+        columns = schema.columns(fmt)
+    args = []
+    for field in schema.fields:
+        if fmt == "json":
+            src = f"obj[{field.name!r}]" if not field.ref else f"obj.get({field.name!r})"
+        elif field.name in columns:
+            src = f"obj[{columns.index(field.name)}]"
+        elif field.ref:
+            src = "None"
+        else:
+            raise ValueError(f"Missing column {field.name!r} for {schema.name}")
+        args.append(_decode_expr(field, fmt, src))
+    source = (f"def decode_{schema.name}_{fmt}(obj):\n"
+              f"    return model({', '.join(args)})\n")
+    return _compile(f"decode_{schema.name}_{fmt}", source, {"model": schema.model})
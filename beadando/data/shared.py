@@ -0,0 +1,275 @@
+import json
+import os
+import sys
+from array import array
+from collections.abc import Iterable, Sequence
+from functools import lru_cache
+from multiprocessing import shared_memory
+
+from . import metrics, schema
+from .model_dataclasses import Person, Workplace, Address
+
+
+SHARED_VERSION = 1
+ENTITIES = ("person", "workplace", "address")
+# fejléc: 8 bájtos hossz + JSON leíró, utána 8 bájtra igazított oszloppufferek
+HEADER = 8
+ALIGN = 8
+
+
+def _align(offset: int) -> int:
+    return (offset + ALIGN - 1) // ALIGN * ALIGN
+
+
+def _encode_table(entity: str, objects: Iterable) -> tuple[int, dict[str, dict[str, tuple[bytes, str]]]]:
+    # oszlopos elrendezés: int -> int64 tömb, bool -> bájtok, szöveg / id -> offsets (int64) + UTF-8 adat,
+    # opcionális kapcsolat -> nulls bájttömb, id lista -> vesszővel összefűzött szöveg
+    fields = schema.get_schema(entity).fields
+    rows = list(map(schema.encoder(entity, "pickle"), objects))
+    columns = {}
+    for position, field in enumerate(fields):
+        values = [row[position] for row in rows]
+        if field.many:
+            values = [",".join(value) for value in values]
+        if field.type is int and not field.ref:
+            columns[field.name] = {"values": (array("q", values).tobytes(), "q")}
+        elif field.type is bool:
+            columns[field.name] = {"values": (bytes(map(bool, values)), "B")}
+        else:
+            buffers = {}
+            if field.ref and not field.many:
+                buffers["nulls"] = (bytes(value is None for value in values), "B")
+                values = ["" if value is None else value for value in values]
+            encoded = [value.encode("utf-8") for value in values]
+            offsets = array("q", [0])
+            total = 0
+            for item in encoded:
+                total += len(item)
+                offsets.append(total)
+            buffers["offsets"] = (offsets.tobytes(), "q")
+            buffers["data"] = (b"".join(encoded), "B")
+            columns[field.name] = buffers
+    return len(rows), columns
+
+
+def _getter(field: schema.Field, buffers: dict[str, memoryview]):
+    if field.type is int and not field.ref:
+        return buffers["values"].__getitem__
+    if field.type is bool:
+        values = buffers["values"]
+        return lambda index: values[index] != 0
+    offsets = buffers["offsets"]
+    data = buffers["data"]
+
+    def text(index: int) -> str:
+        return str(data[offsets[index]:offsets[index + 1]], "utf-8")
+
+    if field.many:
+        return lambda index: (value := text(index)) and value.split(",") or []
+    if "nulls" in buffers:
+        nulls = buffers["nulls"]
+        return lambda index: None if nulls[index] else text(index)
+    return text
+
+
+@lru_cache(maxsize=None)
+def _row_class(entity: str) -> type:
+    # dataclass-szerű, csak olvasható sornézet: attribútumonként olvas a megosztott pufferekből
+    model = schema.get_schema(entity).model
+    names = schema.get_schema(entity).columns("pickle")
+
+    def __init__(self, table: "Table", index: int) -> None:
+        self._table = table
+        self._index = index
+
+    def __repr__(self) -> str:
+        values = ", ".join(f"{name}={getattr(self, name)!r}" for name in names)
+        return f"{model.__name__}({values})"
+
+    def __eq__(self, other) -> bool:
+        if other.__class__ is not self.__class__:
+            return NotImplemented
+        return self._astuple() == other._astuple()
+
+    def _astuple(self) -> tuple:
+        return tuple(getattr(self, name) for name in names)
+
+    def _asdict(self) -> dict:
+        return {name: getattr(self, name) for name in names}
+
+    def to_object(self):
+        # saját (másolt) modell objektum, a kapcsolatok id-k
+        return model(*self._astuple())
+
+    namespace = {
+        "__slots__": ("_table", "_index"),
+        "__match_args__": names,
+        "__init__": __init__,
+        "__repr__": __repr__,
+        "__eq__": __eq__,
+        "__hash__": None,
+        "_astuple": _astuple,
+        "_asdict": _asdict,
+        "to_object": to_object,
+    }
+    for name in names:
+        namespace[name] = property(lambda self, name=name: self._table._getters[name](self._index))
+    return type(f"Shared{model.__name__}", (), namespace)
+
+
+class Table(Sequence):
+    def __init__(self, entity: str, rows: int, buffers: dict[str, dict[str, memoryview]]) -> None:
+        self.entity = entity
+        self._rows = rows
+        self._buffers = buffers
+        self._getters = {field.name: _getter(field, buffers[field.name])
+                         for field in schema.get_schema(entity).fields}
+        self._row = _row_class(entity)
+
+    def __len__(self) -> int:
+        return self._rows
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self._row(self, i) for i in range(*index.indices(self._rows))]
+        if index < 0:
+            index += self._rows
+        if not 0 <= index < self._rows:
+            raise IndexError("row index out of range")
+        return self._row(self, index)
+
+    def column(self, name: str) -> memoryview:
+        # int / bool oszlop másolás nélkül (pl. sum(table.column("age")))
+        buffers = self._buffers[name]
+        if "values" not in buffers:
+            raise ValueError(f"{name!r} is not a numeric column")
+        return buffers["values"]
+
+
+def _tracker_id() -> str | None:
+    # a resource tracker csövének azonosítója; a multiprocessing gyerekfolyamatok a szülő trackerét
+    # öröklik (3.13-tól a csatolás nem regisztrál, Windowson nincs tracker)
+    if sys.version_info >= (3, 13) or sys.platform == "win32":
+        return None
+    from multiprocessing import resource_tracker
+
+    stat = os.fstat(resource_tracker.getfd())
+    return f"{stat.st_dev}:{stat.st_ino}"
+
+
+class SharedDataset:
+    # egy megosztott memóriaszegmens a három entitás oszlopaival; a name alapján bármely folyamat csatolhat
+    def __init__(self, memory: shared_memory.SharedMemory, owner: bool = False) -> None:
+        self._memory = memory
+        self.owner = owner
+        buffer = memory.buf.toreadonly()
+        length = int.from_bytes(buffer[:HEADER], "little")
+        layout = json.loads(str(buffer[HEADER:HEADER + length], "utf-8"))
+        start = _align(HEADER + length)
+        self.tracker = layout.get("tracker")
+        if layout.get("version") != SHARED_VERSION:
+            buffer.release()
+            raise ValueError(f"Unsupported shared dataset version: {layout.get('version')!r}")
+        self._views = [buffer]
+        self.tables = {}
+        for entity, table in layout["tables"].items():
+            buffers = {}
+            for column, parts in table["columns"].items():
+                buffers[column] = {}
+                for part, (offset, size, fmt) in parts.items():
+                    view = buffer[start + offset:start + offset + size].cast(fmt)
+                    self._views.append(view)
+                    buffers[column][part] = view
+            self.tables[entity] = Table(entity, table["rows"], buffers)
+
+    @property
+    def name(self) -> str:
+        return self._memory.name
+
+    @property
+    def size(self) -> int:
+        return self._memory.size
+
+    @property
+    def people(self) -> Table:
+        return self.tables["person"]
+
+    @property
+    def workplaces(self) -> Table:
+        return self.tables["workplace"]
+
+    @property
+    def addresses(self) -> Table:
+        return self.tables["address"]
+
+    def close(self) -> None:
+        # a nézeteket el kell engedni, különben a szegmens nem zárható le
+        self.tables = {}
+        for view in reversed(self._views):
+            view.release()
+        self._views = []
+        self._memory.close()
+
+    def unlink(self) -> None:
+        self._memory.unlink()
+
+    def __enter__(self) -> "SharedDataset":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+        if self.owner:
+            self.unlink()
+
+
+def publish(people: Iterable[Person] = (),
+            workplaces: Iterable[Workplace] = (),
+            addresses: Iterable[Address] = (),
+            name: str | None = None) -> SharedDataset:
+    # a visszaadott példány a tulajdonos: with blokk végén (vagy unlink()-kel) törli a szegmenst
+    with metrics.timer("shared.publish"):
+        tables = {entity: _encode_table(entity, objects)
+                  for entity, objects in zip(ENTITIES, (people, workplaces, addresses))}
+
+        layout = {"version": SHARED_VERSION, "tracker": _tracker_id(), "tables": {}}
+        pieces = []
+        offset = 0
+        for entity, (rows, columns) in tables.items():
+            described = {}
+            for column, parts in columns.items():
+                described[column] = {}
+                for part, (data, fmt) in parts.items():
+                    described[column][part] = [offset, len(data), fmt]
+                    pieces.append((offset, data))
+                    offset = _align(offset + len(data))
+            layout["tables"][entity] = {"rows": rows, "columns": described}
+
+        # a leíró offsetjei a fejléc utáni (igazított) adatterület elejétől számítanak
+        header = json.dumps(layout).encode("utf-8")
+        start = _align(HEADER + len(header))
+
+        memory = shared_memory.SharedMemory(name=name, create=True, size=max(1, start + offset))
+        buffer = memory.buf
+        buffer[:HEADER] = len(header).to_bytes(HEADER, "little")
+        buffer[HEADER:HEADER + len(header)] = header
+        for position, data in pieces:
+            buffer[start + position:start + position + len(data)] = data
+        del buffer
+    metrics.count("shared.publish.bytes", memory.size)
+    return SharedDataset(memory, owner=True)
+
+
+def attach(name: str) -> SharedDataset:
+    # másolás nélküli, csak olvasható csatolás egy másik folyamat által publikált adathalmazhoz
+    if sys.version_info >= (3, 13):
+        return SharedDataset(shared_memory.SharedMemory(name=name, track=False))
+    dataset = SharedDataset(shared_memory.SharedMemory(name=name))
+    # 3.13 előtt a csatolás is regisztrál a resource trackernél, ami a csatoló folyamat kilépésekor
+    # törölné a szegmenst, pedig a törlés a publikáló dolga. Saját trackernél a regisztrációt
+    # visszavonjuk; a publikálóval közös trackernél (multiprocessing gyerekfolyamat) a regisztráció
+    # nem új bejegyzés, a visszavonás viszont a publikálóét törölné
+    if sys.platform != "win32" and dataset.tracker != _tracker_id():
+        from multiprocessing import resource_tracker
+
+        resource_tracker.unregister(dataset._memory._name, "shared_memory")
+    return dataset
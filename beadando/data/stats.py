@@ -0,0 +1,250 @@
+import argparse
+import base64
+import hashlib
+import json
+import math
+import sys
+from collections import Counter
+from collections.abc import Iterable, Iterator
+
+from . import metrics
+
+
+STATS_VERSION = 1
+SIDECAR = "stats.json"
+# 2^12 regiszter (4 KiB), kb. 1.6% relatív hiba
+HLL_PRECISION = 12
+TOP = 10
+
+
+class MinMax:
+    __slots__ = ("count", "total", "min", "max")
+
+    def __init__(self) -> None:
+        self.count = 0
+        self.total = 0
+        self.min = None
+        self.max = None
+
+    def add(self, value) -> None:
+        self.count += 1
+        self.total += value
+        if self.min is None or value < self.min:
+            self.min = value
+        if self.max is None or value > self.max:
+            self.max = value
+
+    def merge(self, other: "MinMax") -> None:
+        self.count += other.count
+        self.total += other.total
+        if other.min is not None and (self.min is None or other.min < self.min):
+            self.min = other.min
+        if other.max is not None and (self.max is None or other.max > self.max):
+            self.max = other.max
+
+    @property
+    def mean(self) -> float | None:
+        return self.total / self.count if self.count else None
+
+    def to_dict(self) -> dict:
+        return {"count": self.count, "sum": self.total, "min": self.min, "max": self.max}
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "MinMax":
+        result = cls()
+        result.count = data["count"]
+        result.total = data["sum"]
+        result.min = data["min"]
+        result.max = data["max"]
+        return result
+
+
+class HyperLogLog:
+    # közelítő distinct count; két példány regiszterenkénti maximummal egyesíthető
+    __slots__ = ("p", "registers")
+
+    def __init__(self, p: int = HLL_PRECISION) -> None:
+        assert 4 <= p <= 16
+        self.p = p
+        self.registers = bytearray(1 << p)
+
+    def add(self, value: str) -> None:
+        x = int.from_bytes(hashlib.blake2b(value.encode(), digest_size=8).digest(), "big")
+        index = x >> (64 - self.p)
+        # a maradék bitek vezető nulláinak száma + 1
+        rest = (x << self.p) & 0xFFFF_FFFF_FFFF_FFFF
+        rank = 64 - rest.bit_length() + 1 if rest else 64 - self.p + 1
+        if rank > self.registers[index]:
+            self.registers[index] = rank
+
+    def merge(self, other: "HyperLogLog") -> None:
+        if other.p != self.p:
+            raise ValueError(f"HyperLogLog precision mismatch: {self.p} != {other.p}")
+        self.registers = bytearray(map(max, self.registers, other.registers))
+
+    def estimate(self) -> int:
+        m = len(self.registers)
+        alpha = 0.7213 / (1 + 1.079 / m)
+        estimate = alpha * m * m / sum(2.0 ** -r for r in self.registers)
+        zeros = self.registers.count(0)
+        # kis számosságnál linear counting pontosabb
+        if estimate <= 2.5 * m and zeros:
+            estimate = m * math.log(m / zeros)
+        return round(estimate)
+
+    def to_dict(self) -> dict:
+        return {"p": self.p, "registers": base64.b64encode(self.registers).decode("ascii")}
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "HyperLogLog":
+        result = cls(data["p"])
+        result.registers = bytearray(base64.b64decode(data["registers"]))
+        return result
+
+
+def _ref(value) -> str | None:
+    if value is None or value.__class__ is str:
+        return value
+    return value.id
+
+
+class Stats:
+    # egyesíthető akkumulátorok; az export közben soronként frissül, újraolvasás nélkül
+    DISTINCT = ("name", "workplace", "city", "country")
+
+    def __init__(self) -> None:
+        self.rows = Counter()
+        self.male = 0
+        self.age = MinMax()
+        self.ages = Counter()
+        self.residents_per_city = Counter()
+        self.employees = MinMax()
+        self.employees_histogram = Counter()
+        self.distinct = {name: HyperLogLog() for name in self.DISTINCT}
+
+    def add(self, entity: str, obj) -> None:
+        self.rows[entity] += 1
+        if entity == "person":
+            self.male += bool(obj.male)
+            self.age.add(obj.age)
+            self.ages[obj.age] += 1
+            self.distinct["name"].add(obj.name)
+            if (workplace := _ref(obj.workplace)) is not None:
+                self.distinct["workplace"].add(workplace)
+            # a város csak objektumként kapott címnél ismert (generálás közben)
+            address = obj.address
+            if address is not None and address.__class__ is not str:
+                self.residents_per_city[address.city] += 1
+        elif entity == "workplace":
+            size = len(obj.employees or ())
+            self.employees.add(size)
+            self.employees_histogram[size] += 1
+        elif entity == "address":
+            self.distinct["city"].add(obj.city)
+            self.distinct["country"].add(obj.country)
+        else:
+            raise KeyError(f"Unknown entity: {entity!r}")
+
+    def update(self, entity: str, objects: Iterable) -> None:
+        with metrics.timer("stats.update"):
+            for obj in objects:
+                self.add(entity, obj)
+
+    def observe(self, entity: str, objects: Iterable) -> Iterator:
+        # átmenő stream egy író elé: write_people(stats.observe("person", people), ...)
+        for obj in objects:
+            self.add(entity, obj)
+            yield obj
+
+    def merge(self, other: "Stats") -> "Stats":
+        self.rows.update(other.rows)
+        self.male += other.male
+        self.age.merge(other.age)
+        self.ages.update(other.ages)
+        self.residents_per_city.update(other.residents_per_city)
+        self.employees.merge(other.employees)
+        self.employees_histogram.update(other.employees_histogram)
+        for name, sketch in other.distinct.items():
+            self.distinct[name].merge(sketch)
+        return self
+
+    def summary(self, top: int = TOP) -> dict:
+        people = self.rows["person"]
+        return {
+            "rows": dict(self.rows),
+            "male_ratio": self.male / people if people else None,
+            "age": {"min": self.age.min, "max": self.age.max, "mean": self.age.mean},
+            "employees_per_workplace": {"min": self.employees.min, "max": self.employees.max,
+                                        "mean": self.employees.mean},
+            "top_cities": dict(self.residents_per_city.most_common(top)),
+            "distinct": {name: sketch.estimate() for name, sketch in self.distinct.items()},
+        }
+
+    def to_dict(self) -> dict:
+        return {
+            "version": STATS_VERSION,
+            "summary": self.summary(),
+            "rows": dict(self.rows),
+            "male": self.male,
+            "age": self.age.to_dict(),
+            "ages": {str(age): count for age, count in sorted(self.ages.items())},
+            "residents_per_city": dict(self.residents_per_city.most_common()),
+            "employees": self.employees.to_dict(),
+            "employees_histogram": {str(size): count
+                                    for size, count in sorted(self.employees_histogram.items())},
+            "distinct": {name: sketch.to_dict() for name, sketch in self.distinct.items()},
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "Stats":
+        if data.get("version") != STATS_VERSION:
+            raise ValueError(f"Unsupported stats version: {data.get('version')!r}")
+        result = cls()
+        result.rows = Counter(data["rows"])
+        result.male = data["male"]
+        result.age = MinMax.from_dict(data["age"])
+        result.ages = Counter({int(age): count for age, count in data["ages"].items()})
+        result.residents_per_city = Counter(data["residents_per_city"])
+        result.employees = MinMax.from_dict(data["employees"])
+        result.employees_histogram = Counter({int(size): count
+                                              for size, count in data["employees_histogram"].items()})
+        for name, sketch in data["distinct"].items():
+            result.distinct[name] = HyperLogLog.from_dict(sketch)
+        return result
+
+    def save(self, path: str) -> None:
+        with open(path, "w", encoding="utf-8") as file:
+            json.dump(self.to_dict(), file, ensure_ascii=False, indent=1)
+
+    @classmethod
+    def load(cls, path: str) -> "Stats":
+        with open(path, encoding="utf-8") as file:
+            return cls.from_dict(json.load(file))
+
+
+def merge_files(paths: Iterable[str]) -> Stats:
+    # párhuzamos shardok sidecar fájljainak egyesítése az adatok újraolvasása nélkül
+    result = Stats()
+    for path in paths:
+        result.merge(Stats.load(path))
+    return result
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(
+        prog="python -m data.stats",
+        description="Merge and summarize export statistics sidecars")
+    parser.add_argument("paths", nargs="+", help=f"{SIDECAR} files (e.g. one per shard)")
+    parser.add_argument("-o", "--output", default=None, help="write the merged sidecar here")
+    parser.add_argument("--top", type=int, default=TOP, help="cities listed in the summary")
+    args = parser.parse_args(argv)
+
+    merged = merge_files(args.paths)
+    if args.output:
+        merged.save(args.output)
+    print(json.dumps(merged.summary(args.top), indent=2, ensure_ascii=False))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
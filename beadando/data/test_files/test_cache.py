@@ -0,0 +1,54 @@
+import os
+
+import pytest
+
+from data import cache, metrics
+
+
+@pytest.fixture
+def counters():
+    metrics.enable()
+    yield lambda: metrics.snapshot()["counters"]
+    metrics.disable()
+
+
+def _ids(dataset):
+    return [[obj.id for obj in objects] for objects in dataset]
+
+
+def test_hit_and_miss(tmp_path, counters):
+    first = cache.cached_dataset(30, seed=1, cache_dir=str(tmp_path))
+    assert counters()["cache.misses"] == 1 and "cache.hits" not in counters()
+    second = cache.cached_dataset(30, seed=1, cache_dir=str(tmp_path))
+    assert counters()["cache.hits"] == 1
+    assert _ids(second) == _ids(first)
+    people, workplaces, addresses = second
+    # a kapcsolatok objektumként állnak vissza
+    assert people[0].address.resident is people[0] and people[0].workplace in workplaces
+    # más paraméter más kulcs
+    cache.cached_dataset(30, seed=2, cache_dir=str(tmp_path))
+    assert counters()["cache.misses"] == 2 and len(cache.entries(str(tmp_path))) == 2
+
+
+def test_invalid_entries(tmp_path):
+    key = cache.cache_key(10, seed=1)
+    assert cache.load(key, str(tmp_path)) is None
+    path = cache.save(key, [], [], [], cache_dir=str(tmp_path))
+    with open(path, "wb") as file:
+        file.write(b"not a pickle")
+    # sérült fájl: hiányzónak számít és törlődik
+    assert cache.load(key, str(tmp_path)) is None and not os.path.exists(path)
+
+
+def test_eviction(tmp_path):
+    cache_dir = str(tmp_path)
+    keys = [cache.cache_key(20, seed=seed) for seed in range(3)]
+    for i, key in enumerate(keys):
+        path = cache.save(key, [], [], [], cache_dir=cache_dir)
+        os.utime(path, (1000 + i, 1000 + i))
+    # a load frissíti a használati időt, így a legrégebben használt a második lesz
+    assert cache.load(keys[0], cache_dir) is not None
+    size = cache.entries(cache_dir)[0][1]
+    assert cache.evict(2 * size, cache_dir) == [keys[1]]
+    assert {key for key, _, _ in cache.entries(cache_dir)} == {keys[0], keys[2]}
+    assert cache.clear(cache_dir) == 2
@@ -0,0 +1,72 @@
+import dataclasses
+
+import pytest
+
+from data import diff, generator
+from data.handler import csv_dict, json_handler
+
+
+@pytest.fixture(scope="module")
+def dataset():
+    return generator.generate_dataset(40, seed=3)
+
+
+def _export(path, people, workplaces, addresses):
+    path.mkdir(exist_ok=True)
+    csv_dict.write_people(people, str(path))
+    csv_dict.write_workplaces(workplaces, str(path))
+    csv_dict.write_addresses(addresses, str(path))
+    return str(path)
+
+
+@pytest.fixture(scope="module")
+def exports(dataset, tmp_path_factory):
+    people, workplaces, addresses = dataset
+    left = _export(tmp_path_factory.mktemp("left"), people, workplaces, addresses)
+    # egy törölt, egy módosított és egy új ember
+    changed = dataclasses.replace(people[5], age=people[5].age + 1)
+    added = dataclasses.replace(people[0], id="P-999999")
+    right_people = people[1:5] + [changed] + people[6:] + [added]
+    right = _export(tmp_path_factory.mktemp("right"), right_people, workplaces, addresses)
+    return left, right
+
+
+@pytest.mark.parametrize("mode", diff.MODES)
+def test_changes(exports, dataset, mode):
+    people = dataset[0]
+    changes = {(c.kind, c.id): c for c in diff.diff(*exports, mode=mode, buckets=4)}
+    assert set(changes) == {("removed", people[0].id), ("changed", people[5].id), ("added", "P-999999")}
+    assert changes["changed", people[5].id].fields == {"age": [people[5].age, people[5].age + 1]}
+
+
+def test_modes_agree(exports):
+    def key(change):
+        return change.entity, change.id
+
+    sort = [c.to_dict() for c in diff.diff(*exports, mode="sort")]
+    hash = [c.to_dict() for c in sorted(diff.diff(*exports, mode="hash", buckets=4), key=key)]
+    assert sort == hash
+
+
+@pytest.mark.parametrize("mode", diff.MODES)
+def test_mixed_formats(dataset, exports, tmp_path, mode):
+    # dekódolás után hasonlít, így a csv és a tömörített json export azonos
+    people, workplaces, addresses = dataset
+    json_handler.write_people(people, str(tmp_path), compression="gzip")
+    json_handler.write_workplaces(workplaces, str(tmp_path), compression="gzip")
+    json_handler.write_addresses(addresses, str(tmp_path), compression="gzip")
+    changes = diff.diff(exports[0], str(tmp_path), "csv", "json", right_compression="gzip", mode=mode)
+    assert list(changes) == []
+
+
+@pytest.mark.parametrize("mode", diff.MODES)
+@pytest.mark.parametrize("side", ["left", "right"])
+def test_duplicate_id(dataset, tmp_path, mode, side):
+    people, workplaces, addresses = dataset
+    clean = _export(tmp_path / "clean", people, workplaces, addresses)
+    duplicated = _export(tmp_path / "duplicated", people + [people[7]], workplaces, addresses)
+    paths = (duplicated, clean) if side == "left" else (clean, duplicated)
+    message = f"duplicate person id {people[7].id!r} in the {side} export"
+    with pytest.raises(ValueError, match=message):
+        list(diff.diff_entity("person", *paths, mode=mode, buckets=4))
+    assert diff.main([*paths, "--entity", "person", "--mode", mode, "--summary"]) == 2
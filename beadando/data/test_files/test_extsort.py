@@ -0,0 +1,36 @@
+import random
+
+import pytest
+
+from data import extsort, generator
+
+
+def test_external_sort_runs(tmp_path):
+    items = [random.Random(1).randrange(1000) for _ in range(500)]
+    # 500 elem 64-es futamokban: 8 temp fájl összefésülése
+    sorter = extsort.ExternalSorter(run_size=64, tmp_dir=str(tmp_path))
+    sorter.extend(items)
+    assert len(sorter.runs) == 7 and sorter.count == 500
+    assert list(sorter) == sorted(items)
+    assert list(extsort.external_sort(items, reverse=True, run_size=64)) == sorted(items, reverse=True)
+
+
+def test_close_removes_runs(tmp_path):
+    with extsort.ExternalSorter(run_size=10, tmp_dir=str(tmp_path)) as sorter:
+        sorter.extend(range(100, 0, -1))
+        runs = list(sorter.runs)
+    assert sorter.runs == [] and all(run.closed for run in runs)
+
+
+@pytest.mark.parametrize("by, key", [("id", lambda p: p.id), ("age", lambda p: (p.age, p.id))])
+def test_sorted_objects(by, key):
+    people = generator.generate_dataset(120, seed=11)[0]
+    result = list(extsort.sorted_objects(people, "person", by, run_size=16))
+    assert [p.id for p in result] == [p.id for p in sorted(people, key=key)]
+    # a kapcsolatok id-ként jönnek vissza
+    assert result[0].workplace.__class__ is str
+
+
+def test_unknown_sort_key():
+    with pytest.raises(ValueError, match="Cannot sort"):
+        extsort.sort_key("workplace", "age")
@@ -0,0 +1,20 @@
+import os
+
+import pytest
+
+from data import benchmark
+
+# az időkeret gépfüggő, ezért csak kérésre ellenőrzött: BEADANDO_IMPORT_BUDGET=<szorzó> (pl. 1 vagy 3)
+IMPORT_BUDGET = os.environ.get("BEADANDO_IMPORT_BUDGET")
+
+
+def test_no_heavy_imports():
+    # a lusta függőségek (faker, openpyxl, oracledb) importja nem történhet meg a modul betöltésekor
+    results = benchmark.check_imports(repeat=1)
+    assert {r["module"]: r["loaded"] for r in results} == {r["module"]: [] for r in results}
+
+
+@pytest.mark.skipif(not IMPORT_BUDGET, reason="set BEADANDO_IMPORT_BUDGET to check import times")
+def test_import_budgets():
+    results = benchmark.check_imports(tolerance=float(IMPORT_BUDGET))
+    assert [r["module"] for r in results if r["over_budget"]] == []
@@ -0,0 +1,35 @@
+import os
+
+import pytest
+
+from data import generator, partition
+
+
+@pytest.fixture(scope="module")
+def people():
+    return generator.generate_dataset(60, seed=7)[0]
+
+
+@pytest.mark.parametrize("fmt", ["csv", "json", "xlsx"])
+def test_round_trip(people, tmp_path, fmt):
+    counts = partition.write_partitioned(people, str(tmp_path), by="age", fmt=fmt)
+    for name in counts:
+        # minden formátumban az entitás nevű fájl (people.xlsx is, nem data.xlsx)
+        assert os.listdir(tmp_path / name) == [f"people.{fmt}"]
+    loaded = partition.read_partitioned(str(tmp_path), fmt)
+    assert sorted((p.id, p.age) for p in loaded) == sorted((p.id, p.age) for p in people)
+
+
+def test_pruning(people, tmp_path):
+    counts = partition.write_partitioned(people, str(tmp_path), by="city")
+    assert sum(counts.values()) == len(people)
+    cities = sorted({p.address.city for p in people})[:2]
+    matching = partition.partitions(str(tmp_path), where={"city": set(cities)})
+    # csak a feltételnek megfelelő könyvtárak nyílnak meg
+    assert [value for _, value, _ in matching] == cities
+    loaded = partition.read_partitioned(str(tmp_path), where={"city": set(cities)})
+    assert sorted(p.id for p in loaded) == sorted(p.id for p in people if p.address.city in cities)
+    predicate = partition.partitions(str(tmp_path), where={"city": lambda city: city == cities[0]})
+    assert [value for _, value, _ in predicate] == cities[:1]
+    with pytest.raises(ValueError, match="partitioned by 'city'"):
+        partition.partitions(str(tmp_path), where={"age": "0-9"})
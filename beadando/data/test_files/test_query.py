@@ -0,0 +1,53 @@
+import pytest
+
+from data import generator, query
+from data.handler import csv_dict
+from data.query import between
+
+
+@pytest.fixture(scope="module")
+def dataset():
+    return generator.generate_dataset(200, seed=13)
+
+
+@pytest.fixture
+def ds(dataset):
+    return query.Dataset(*dataset)
+
+
+def test_indexes(ds, dataset):
+    people, workplaces, _ = dataset
+    workplace = workplaces[0].id
+    q = ds.people.where(age=between(20, 60), workplace=workplace, male=True)
+    expected = [p.id for p in people
+                if 20 <= p.age <= 60 and p.workplace.id == workplace and p.male]
+    assert q.ids() == expected
+    # age: rendezett index, workplace / male: hash index; a következő lekérdezés ugyanazokat használja
+    assert set(ds._sorted) == {("person", "age")}
+    assert set(ds._hash) == {("person", "workplace"), ("person", "male")}
+    hashed = ds.hash_index("person", "workplace")
+    assert ds.people.where(workplace=workplace).count() == len(hashed[workplace])
+    assert ds.hash_index("person", "workplace") is hashed
+
+
+def test_derived_and_predicates(ds, dataset):
+    people = dataset[0]
+    city = people[0].address.city
+    assert ds.people.where(city=city).ids() == [p.id for p in people if p.address.city == city]
+    assert ds.people.where(age=lambda age: age % 7 == 0).ids() == [p.id for p in people if p.age % 7 == 0]
+    assert ds.people.where(age={1, 2, 3}).ids() == [p.id for p in people if p.age in {1, 2, 3}]
+    assert ds.people.where(age=None).count() == 0
+    assert ds.get("person", people[3].id) is people[3]
+
+
+def test_scan_pushdown(ds, dataset, tmp_path):
+    people, workplaces, addresses = dataset
+    csv_dict.write_people(people, str(tmp_path))
+    csv_dict.write_workplaces(workplaces, str(tmp_path))
+    csv_dict.write_addresses(addresses, str(tmp_path))
+    city = people[0].address.city
+    # a feltételek az olvasóba kerülnek; a város a címfájlon át szűr
+    scanned = query.scan(str(tmp_path), "person", "csv", city=city, age=between(None, 50))
+    assert [p.id for p in scanned] == ds.people.where(city=city, age=between(None, 50)).ids()
+    loaded = query.Dataset.load(str(tmp_path), "csv")
+    assert loaded.people.where(city=city).ids() == ds.people.where(city=city).ids()
@@ -0,0 +1,38 @@
+import pytest
+
+from data import generator, relations
+from data.handler import csv_dict, json_handler
+
+
+@pytest.fixture(scope="module")
+def dataset():
+    return generator.generate_dataset(100, seed=19)
+
+
+def test_build(dataset):
+    people, workplaces, addresses = dataset
+    rel = relations.build_relations(people, workplaces, addresses)
+    for row, workplace in enumerate(workplaces):
+        expected = [p.id for p in people if p.workplace is workplace]
+        assert rel.employee_ids(workplace.id) == expected
+        assert rel.employees.degree(row) == len(expected)
+    assert rel.resident_ids(addresses[0].id) == [p.id for p in people if p.address is addresses[0]]
+
+
+def test_csr():
+    csr = relations.CSR.from_rows(3, [2, -1, 0, 2])
+    assert list(csr.offsets) == [0, 1, 1, 3] and list(csr.indices) == [2, 0, 3]
+    assert csr == relations.CSR.from_lists([[2], [], [0, 3]])
+    assert relations.CSR.from_dict(csr.to_dict()) == csr
+    assert list(csr.neighbours(2)) == [0, 3] and len(csr) == 3
+
+
+@pytest.mark.parametrize("module", [csv_dict, json_handler])
+def test_round_trip(dataset, tmp_path, module):
+    rel = relations.build_relations(*dataset)
+    module.write_relations(rel, str(tmp_path))
+    loaded = module.read_relations(str(tmp_path))
+    for relation in relations.RELATIONS:
+        assert list(loaded.adjacency(relation)) == list(rel.adjacency(relation))
+    if module is json_handler:
+        assert loaded == rel
@@ -0,0 +1,45 @@
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+
+import pytest
+
+from data import generator, shared
+
+
+@pytest.fixture(scope="module")
+def dataset():
+    return generator.generate_dataset(50, seed=23)
+
+
+def _worker(name: str) -> tuple[int, int, str]:
+    with shared.attach(name) as dataset:
+        return len(dataset.people), sum(dataset.people.column("age")), dataset.people[0].workplace
+
+
+def test_publish_attach(dataset):
+    people, workplaces, addresses = dataset
+    with shared.publish(people, workplaces, addresses) as published:
+        with shared.attach(published.name) as attached:
+            assert len(attached.people) == len(people)
+            person = people[5]
+            assert attached.people[5]._astuple() == (person.id, person.name, person.age, person.male,
+                                                     person.workplace.id, person.address.id)
+            assert attached.people[5] == attached.people[5] and attached.people[5] != attached.people[6]
+            assert attached.people[5].to_object().address == people[5].address.id
+            assert attached.addresses[0].resident == addresses[0].resident.id
+            assert list(attached.people.column("age")) == [p.age for p in people]
+
+
+@pytest.mark.parametrize("method", ["spawn", "fork"])
+def test_attach_from_process(dataset, method):
+    if method not in multiprocessing.get_all_start_methods():
+        pytest.skip(f"{method} start method not available")
+    people, workplaces, addresses = dataset
+    context = multiprocessing.get_context(method)
+    with shared.publish(people, workplaces, addresses) as published:
+        with ProcessPoolExecutor(2, mp_context=context) as pool:
+            results = list(pool.map(_worker, [published.name] * 2))
+        # a csatoló folyamatok kilépése után is olvasható: a szegmenst nem törölték
+        with shared.attach(published.name) as attached:
+            assert len(attached.workplaces) == len(workplaces)
+    assert results == [(len(people), sum(p.age for p in people), people[0].workplace.id)] * 2
@@ -0,0 +1,38 @@
+from data import generator, stats
+
+
+def _stats(people, workplaces, addresses) -> stats.Stats:
+    result = stats.Stats()
+    result.update("person", people)
+    result.update("workplace", workplaces)
+    result.update("address", addresses)
+    return result
+
+
+def test_merge_equals_whole(tmp_path):
+    people, workplaces, addresses = generator.generate_dataset(300, seed=17)
+    whole = _stats(people, workplaces, addresses)
+    # két shard, a sidecar fájlokon át egyesítve
+    paths = []
+    for i, (start, end) in enumerate(((0, 120), (120, 300))):
+        shard = _stats(people[start:end], workplaces[start // 10:end // 10], addresses[start:end])
+        paths.append(str(tmp_path / f"{i}.json"))
+        shard.save(paths[-1])
+    merged = stats.merge_files(paths)
+    # a summary top listája egyenlő számoknál sorrendfüggő, a nyers akkumulátoroknak egyezniük kell
+    merged_dict, whole_dict = merged.to_dict(), whole.to_dict()
+    del merged_dict["summary"], whole_dict["summary"]
+    assert merged_dict == whole_dict
+    summary = merged.summary()
+    assert summary["rows"] == {"person": 300, "workplace": 30, "address": 300}
+    assert summary["age"]["min"] == min(p.age for p in people)
+    assert abs(summary["distinct"]["name"] - len({p.name for p in people})) <= 10
+
+
+def test_hyperloglog():
+    sketches = [stats.HyperLogLog(), stats.HyperLogLog()]
+    for i in range(20_000):
+        sketches[i % 2].add(str(i // 2))
+    sketches[0].merge(sketches[1])
+    # mindkét fél ugyanazt a 10 000 értéket látta; ~1.6% várható hiba
+    assert abs(sketches[0].estimate() - 10_000) < 500
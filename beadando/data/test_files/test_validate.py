@@ -0,0 +1,108 @@
+import dataclasses
+import json
+
+import pytest
+
+from data import generator, relations, validate
+from data.handler import csv_dict, json_handler
+
+
+MODULES = {"csv": csv_dict, "json": json_handler}
+
+
+@pytest.fixture(scope="module")
+def dataset():
+    return generator.generate_dataset(40, seed=5)
+
+
+def _export(path, fmt, people, workplaces, addresses, relation_data=None):
+    module = MODULES[fmt]
+    path.mkdir(exist_ok=True)
+    module.write_people(people, str(path))
+    module.write_workplaces(workplaces, str(path))
+    module.write_addresses(addresses, str(path))
+    if relation_data is not None:
+        module.write_relations(relation_data, str(path))
+    return str(path)
+
+
+@pytest.mark.parametrize("fmt", MODULES)
+@pytest.mark.parametrize("mode", ["hash", "merge"])
+def test_clean(dataset, tmp_path, fmt, mode):
+    report = validate.validate(_export(tmp_path, fmt, *dataset), fmt, mode=mode)
+    assert report.ok and report.mode == mode
+    assert dict(report.rows) == {"person": 40, "workplace": 4, "address": 40}
+
+
+def test_fallback(dataset, tmp_path):
+    # a keretbe nem férő hash mód merge joinra vált
+    path = _export(tmp_path, "csv", *dataset)
+    assert validate.validate(path, memory_budget=validate.ENTRY_BYTES * 10).mode == "merge"
+    assert validate.validate(path).mode == "hash"
+
+
+def test_issues(dataset, tmp_path):
+    people, workplaces, addresses = dataset
+    # nem létező munkahely, egy másik ember címe és egy ismétlődő ember
+    first = dataclasses.replace(people[0], workplace="WP-999999")
+    second = dataclasses.replace(people[1], address=people[2].address)
+    path = _export(tmp_path, "csv", [first, second] + people[2:] + [people[3]], workplaces, addresses)
+    reports = [validate.validate(path, mode=mode).to_dict() for mode in ("hash", "merge")]
+    assert reports[0]["issues"] == reports[1]["issues"]
+    samples = {issue: value["samples"] for issue, value in reports[0]["issues"].items()}
+    assert samples == {
+        "duplicate_person": [people[3].id],
+        "orphan_person_workplace": [(first.id, "WP-999999")],
+        "employee_mismatch": [(first.id, people[0].workplace.id)],
+        "missing_employee": [(first.id, "WP-999999")],
+        "resident_mismatch": [(second.id, people[1].address.id)],
+    }
+    assert validate.main([path, "--mode", "merge"]) == 1
+
+
+@pytest.mark.parametrize("fmt", MODULES)
+@pytest.mark.parametrize("mode", ["hash", "merge"])
+def test_relations_ok(dataset, tmp_path, fmt, mode):
+    path = _export(tmp_path, fmt, *dataset, relations.build_relations(*dataset))
+    report = validate.validate(path, fmt, mode=mode)
+    assert report.ok, report.to_dict()
+    assert report.rows["employees"] == len(dataset[1])
+    assert report.rows["residents"] == len(dataset[2])
+
+
+@pytest.mark.parametrize("mode", ["hash", "merge"])
+def test_relation_mismatch(dataset, tmp_path, mode):
+    people, workplaces, addresses = dataset
+    # az első munkahely sorában egy idegen és egy nem létező ember
+    rel = relations.build_relations(people, workplaces, addresses)
+    outsider = next(p for p in people if p.workplace is not workplaces[0])
+    employees = [(row_id, members) for row_id, members in rel.adjacency("employees")]
+    employees[0][1].extend([outsider.id, "P-999999"])
+    rel = relations.from_adjacency(employees, rel.adjacency("residents"))
+    path = _export(tmp_path, "csv", people, workplaces, addresses, rel)
+
+    issues = validate.validate(path, "csv", mode=mode).to_dict()["issues"]
+    assert issues["relation_mismatch"]["samples"] == [("employees", outsider.id, workplaces[0].id)]
+    assert issues["orphan_relation_member"]["samples"] == [("employees", "P-999999", workplaces[0].id)]
+
+
+def test_csr_structure(dataset, tmp_path):
+    path = _export(tmp_path, "json", *dataset, relations.build_relations(*dataset))
+    relations_path = tmp_path / "relations.json"
+    data = json.loads(relations_path.read_text())
+    data["employees"]["indices"][0] = len(data["people"])
+    offsets = data["residents"]["offsets"]
+    offsets[1], offsets[2] = offsets[2] + 1, offsets[1]
+    relations_path.write_text(json.dumps(data))
+
+    issues = validate.validate(path, "json").to_dict()["issues"]
+    assert issues["relation_index"]["samples"] == [
+        ("employees", data["workplaces"][0], len(data["people"]))]
+    assert issues["relation_offsets"]["samples"] == [("residents", data["addresses"][1])]
+
+    # kezdő / záró offset hiba esetén a reláció egésze kimarad
+    data["residents"]["offsets"][-1] += 1
+    relations_path.write_text(json.dumps(data))
+    issues = validate.validate(path, "json").to_dict()["issues"]
+    assert issues["relation_offsets"]["samples"] == [("residents", None)]
+    assert validate.main([path, "-f", "json", "--no-relations"]) == 0
@@ -0,0 +1,418 @@
+import argparse
+import json
+import os
+import sys
+from collections import Counter
+from collections.abc import Callable, Iterator
+from dataclasses import dataclass, field
+from itertools import groupby
+from operator import itemgetter
+
+from . import metrics
+from .extsort import ExternalSorter
+from .handler._files import COMPRESSIONS, file_path, open_file
+from .handler._formats import FORMATS, iter_objects
+from .relations import RELATIONS
+
+
+# alapértelmezett memóriakeret és egy hash-/rendező-bejegyzés becsült mérete (id string + tuple / dict slot)
+MEMORY_BUDGET = 256 * 1024 ** 2
+ENTRY_BYTES = 200
+SAMPLE_SIZE = 10
+MODES = ("auto", "hash", "merge")
+# ennyi soronként ellenőrzi a hash mód a memóriakeretet
+CHECK_EVERY = 65_536
+
+ISSUES = (
+    "duplicate_person",         # person id
+    "duplicate_workplace",      # workplace id
+    "duplicate_address",        # address id
+    "orphan_person_workplace",  # (person id, workplace id): nincs ilyen munkahely
+    "orphan_person_address",    # (person id, address id): nincs ilyen cím
+    "orphan_employee",          # (person id, workplace id): az employees nem létező emberre mutat
+    "orphan_resident",          # (person id, address id): a resident nem létező emberre mutat
+    "employee_mismatch",        # (person id, workplace id): az employees-ben van, de máshol dolgozik
+    "missing_employee",         # (person id, workplace id): a munkahelye employees listájában nincs benne
+    "resident_mismatch",        # (person id, address id): ő a resident, de máshol lakik
+    "relation_offsets",         # (reláció, sor id / None): az offsets nem 0-tól len(indices)-ig monoton
+    "relation_index",           # (reláció, sor id, index): az index kívül esik a people listán
+    "orphan_relation_member",   # (reláció, person id, sor id): nem létező emberre mutat
+    "relation_mismatch",        # (reláció, person id, sor id): a sora szerint ott, de máshol van
+)
+# relációs fájl (employees / residents) -> a sorok azonosítóit tartalmazó kulcs a relations.json-ben
+ROW_KEYS = {"employees": "workplaces", "residents": "addresses"}
+
+
+@dataclass
+class Report:
+    mode: str
+    rows: Counter = field(default_factory=Counter)
+    counts: Counter = field(default_factory=Counter)
+    samples: dict[str, list] = field(default_factory=dict)
+    sample_size: int = SAMPLE_SIZE
+
+    def add(self, issue: str, sample) -> None:
+        self.counts[issue] += 1
+        samples = self.samples.setdefault(issue, [])
+        if len(samples) < self.sample_size:
+            samples.append(sample)
+
+    @property
+    def ok(self) -> bool:
+        return not self.counts
+
+    def to_dict(self) -> dict:
+        return {
+            "mode": self.mode,
+            "ok": self.ok,
+            "rows": dict(self.rows),
+            "issues": {issue: {"count": self.counts[issue], "samples": self.samples[issue]}
+                       for issue in ISSUES if self.counts[issue]},
+        }
+
+
+class _BudgetExceeded(Exception):
+    pass
+
+
+def _ref(value) -> str | None:
+    if value is None or value == "":
+        return None
+    return value if value.__class__ is str else value.id
+
+
+def _add_member(index: dict, key: str, value: str) -> None:
+    # egy ember több listában is szerepelhet (hibás adat): ütközéskor listává bővül
+    current = index.get(key)
+    if current is None:
+        index[key] = value
+    elif current.__class__ is list:
+        current.append(value)
+    else:
+        index[key] = [current, value]
+
+
+def _members(value) -> list:
+    if value is None:
+        return []
+    return value if value.__class__ is list else [value]
+
+
+def _check_person(report: Report, id: str, workplace: str | None, address: str | None,
+                  listed: list, residing: list, related: dict[str, list]) -> None:
+    for other in listed:
+        if other != workplace:
+            report.add("employee_mismatch", (id, other))
+    if workplace is not None and workplace not in listed:
+        report.add("missing_employee", (id, workplace))
+    for other in residing:
+        if other != address:
+            report.add("resident_mismatch", (id, other))
+    # related: reláció -> azok a sorok, amelyek a relációs fájlban erre az emberre mutatnak
+    for relation, rows in related.items():
+        expected = workplace if relation == "employees" else address
+        for row in rows:
+            if row != expected:
+                report.add("relation_mismatch", (relation, id, row))
+
+
+def _validate_hash(sources: dict[str, Callable[[], Iterator]],
+                   report: Report,
+                   max_entries: int | None) -> None:
+    entries = 0
+
+    def check(size: int) -> None:
+        if max_entries is not None and entries + size > max_entries:
+            raise _BudgetExceeded
+
+    workplaces = set()
+    employee_of: dict[str, object] = {}
+    for i, workplace in enumerate(sources["workplace"]()):
+        report.rows["workplace"] += 1
+        if workplace.id in workplaces:
+            report.add("duplicate_workplace", workplace.id)
+        workplaces.add(workplace.id)
+        for member in workplace.employees or ():
+            _add_member(employee_of, _ref(member), workplace.id)
+        if i % CHECK_EVERY == 0:
+            check(len(workplaces) + len(employee_of))
+    entries = len(workplaces) + len(employee_of)
+
+    addresses = set()
+    resident_of: dict[str, object] = {}
+    for i, address in enumerate(sources["address"]()):
+        report.rows["address"] += 1
+        if address.id in addresses:
+            report.add("duplicate_address", address.id)
+        addresses.add(address.id)
+        if (resident := _ref(address.resident)) is not None:
+            _add_member(resident_of, resident, address.id)
+        if i % CHECK_EVERY == 0:
+            check(len(addresses) + len(resident_of))
+    entries += len(addresses) + len(resident_of)
+
+    rows_of: dict[str, dict[str, object]] = {}
+    for relation in RELATIONS:
+        if relation not in sources:
+            continue
+        members_of = rows_of[relation] = {}
+        for i, (row_id, members) in enumerate(sources[relation]()):
+            report.rows[relation] += 1
+            for member in members:
+                _add_member(members_of, member, row_id)
+            if i % CHECK_EVERY == 0:
+                check(len(members_of))
+        entries += len(members_of)
+
+    people = set()
+    for i, person in enumerate(sources["person"]()):
+        if i % CHECK_EVERY == 0:
+            check(len(people))
+        report.rows["person"] += 1
+        id = person.id
+        if id in people:
+            report.add("duplicate_person", id)
+            continue
+        people.add(id)
+        workplace = _ref(person.workplace)
+        address = _ref(person.address)
+        if workplace is not None and workplace not in workplaces:
+            report.add("orphan_person_workplace", (id, workplace))
+        if address is not None and address not in addresses:
+            report.add("orphan_person_address", (id, address))
+        _check_person(report, id, workplace, address,
+                      _members(employee_of.pop(id, None)), _members(resident_of.pop(id, None)),
+                      {relation: _members(members_of.pop(id, None))
+                       for relation, members_of in rows_of.items()})
+
+    # ami a people bejárása után megmaradt, az nem létező emberre mutat
+    for id, value in employee_of.items():
+        for workplace in _members(value):
+            report.add("orphan_employee", (id, workplace))
+    for id, value in resident_of.items():
+        for address in _members(value):
+            report.add("orphan_resident", (id, address))
+    for relation, members_of in rows_of.items():
+        for id, value in members_of.items():
+            for row in _members(value):
+                report.add("orphan_relation_member", (relation, id, row))
+
+
+# rendezési kulcs alatti tag-ek: 0 = maga az entitás, 1/2 = rá mutató hivatkozás,
+# 3/4 = rá mutató sor a relációs fájlokban
+_DEFINED, _REFERENCED, _RESIDENT = 0, 1, 2
+_RELATION_TAGS = {"employees": 3, "residents": 4}
+
+
+def _validate_merge(sources: dict[str, Callable[[], Iterator]],
+                    report: Report,
+                    run_size: int,
+                    tmp_dir: str | None) -> None:
+    # három rendezett stream (munkahely id, cím id, ember id szerint), csoportonként merge join
+    key = itemgetter(0, 1)
+    by_workplace = ExternalSorter(key, run_size=run_size, tmp_dir=tmp_dir)
+    by_address = ExternalSorter(key, run_size=run_size, tmp_dir=tmp_dir)
+    by_person = ExternalSorter(key, run_size=run_size, tmp_dir=tmp_dir)
+    try:
+        for workplace in sources["workplace"]():
+            report.rows["workplace"] += 1
+            by_workplace.add((workplace.id, _DEFINED, None))
+            for member in workplace.employees or ():
+                by_person.add((_ref(member), _REFERENCED, workplace.id))
+
+        for address in sources["address"]():
+            report.rows["address"] += 1
+            by_address.add((address.id, _DEFINED, None))
+            if (resident := _ref(address.resident)) is not None:
+                by_person.add((resident, _RESIDENT, address.id))
+
+        for person in sources["person"]():
+            report.rows["person"] += 1
+            workplace = _ref(person.workplace)
+            address = _ref(person.address)
+            by_person.add((person.id, _DEFINED, (workplace, address)))
+            if workplace is not None:
+                by_workplace.add((workplace, _REFERENCED, person.id))
+            if address is not None:
+                by_address.add((address, _REFERENCED, person.id))
+
+        for relation, tag in _RELATION_TAGS.items():
+            if relation not in sources:
+                continue
+            for row_id, members in sources[relation]():
+                report.rows[relation] += 1
+                for member in members:
+                    by_person.add((member, tag, row_id))
+
+        for entity, sorter in (("workplace", by_workplace), ("address", by_address)):
+            for id, group in groupby(sorter, itemgetter(0)):
+                defined = 0
+                for _, tag, value in group:
+                    if tag == _DEFINED:
+                        defined += 1
+                        if defined > 1:
+                            report.add("duplicate_" + entity, id)
+                    elif not defined:
+                        report.add(f"orphan_person_{entity}", (value, id))
+
+        for id, group in groupby(by_person, itemgetter(0)):
+            definitions = []
+            listed = []
+            residing = []
+            related = {relation: [] for relation in _RELATION_TAGS if relation in sources}
+            for _, tag, value in group:
+                if tag == _DEFINED:
+                    definitions.append(value)
+                elif tag == _REFERENCED:
+                    listed.append(value)
+                elif tag == _RESIDENT:
+                    residing.append(value)
+                elif tag == _RELATION_TAGS["employees"]:
+                    related["employees"].append(value)
+                else:
+                    related["residents"].append(value)
+            if not definitions:
+                for workplace in listed:
+                    report.add("orphan_employee", (id, workplace))
+                for address in residing:
+                    report.add("orphan_resident", (id, address))
+                for relation, rows in related.items():
+                    for row in rows:
+                        report.add("orphan_relation_member", (relation, id, row))
+                continue
+            for _ in definitions[1:]:
+                report.add("duplicate_person", id)
+            _check_person(report, id, *definitions[0], listed, residing, related)
+    finally:
+        for sorter in (by_workplace, by_address, by_person):
+            sorter.close()
+
+
+def validate_sources(sources: dict[str, Callable[[], Iterator]],
+                     mode: str = "auto",
+                     memory_budget: int = MEMORY_BUDGET,
+                     sample_size: int = SAMPLE_SIZE,
+                     tmp_dir: str | None = None) -> Report:
+    # sources: entitás -> újra megnyitható stream (a merge mód és az auto visszalépés újraolvas);
+    # opcionálisan "employees" / "residents" -> (sor id, tag id-k) párok streamje
+    if mode not in MODES:
+        raise ValueError(f"Unknown mode: {mode!r}")
+    max_entries = max(1, memory_budget // ENTRY_BYTES)
+
+    if mode in ("auto", "hash"):
+        report = Report("hash", sample_size=sample_size)
+        try:
+            with metrics.timer("validate.hash"):
+                _validate_hash(sources, report, max_entries if mode == "auto" else None)
+            return report
+        except _BudgetExceeded:
+            # nem fér a keretbe: külső rendezés + merge join
+            metrics.count("validate.fallbacks")
+
+    report = Report("merge", sample_size=sample_size)
+    with metrics.timer("validate.merge"):
+        # a három rendező puffere együtt fér a keretbe
+        _validate_merge(sources, report, max(1, max_entries // 3), tmp_dir)
+    return report
+
+
+def _csr_rows(data: dict, relation: str, problems: list | None = None) -> Iterator[tuple[str, list[str]]]:
+    # relations.json egy relációja (sor id, tag id-k) párokként; a hibás szerkezetű részek kimaradnak,
+    # és problems-be kerülnek
+    rows = data[ROW_KEYS[relation]]
+    people = data["people"]
+    offsets = data[relation]["offsets"]
+    indices = data[relation]["indices"]
+    if len(offsets) != len(rows) + 1 or offsets[0] != 0 or offsets[-1] != len(indices):
+        if problems is not None:
+            problems.append(("relation_offsets", (relation, None)))
+        return
+    for row, row_id in enumerate(rows):
+        start, end = offsets[row], offsets[row + 1]
+        if start > end:
+            if problems is not None:
+                problems.append(("relation_offsets", (relation, row_id)))
+            continue
+        members = []
+        for index in indices[start:end]:
+            if 0 <= index < len(people):
+                members.append(people[index])
+            elif problems is not None:
+                problems.append(("relation_index", (relation, row_id, index)))
+        yield row_id, members
+
+
+def relation_sources(path: str,
+                     fmt: str = "csv",
+                     compression: str | None = None,
+                     problems: list | None = None) -> dict[str, Callable[[], Iterator]]:
+    # a kiírt relációs fájlok (employees.csv / residents.csv, relations.json), ha vannak
+    if fmt == "csv":
+        from .handler import csv_dict
+
+        return {relation: (lambda relation=relation: csv_dict.iter_relation(path, relation,
+                                                                            compression=compression))
+                for relation in RELATIONS
+                if os.path.exists(file_path(path, relation, ".csv", compression))}
+    if fmt == "json":
+        relations_path = file_path(path, "relations", ".json", compression)
+        if not os.path.exists(relations_path):
+            return {}
+        # a CSR tömbök együtt töltődnek be (a json.load nem streamel), a szerkezet egyszer ellenőrzött
+        with open_file(relations_path, "r", compression) as file:
+            data = json.load(file)
+        for relation in RELATIONS:
+            for _ in _csr_rows(data, relation, problems):
+                pass
+        return {relation: (lambda relation=relation: _csr_rows(data, relation)) for relation in RELATIONS}
+    return {}
+
+
+def validate(path: str,
+             fmt: str = "csv",
+             compression: str | None = None,
+             mode: str = "auto",
+             memory_budget: int = MEMORY_BUDGET,
+             sample_size: int = SAMPLE_SIZE,
+             tmp_dir: str | None = None,
+             relations: bool = True) -> Report:
+    if fmt not in FORMATS:
+        raise ValueError(f"Unknown format: {fmt!r}")
+    sources = {entity: (lambda entity=entity: iter_objects(fmt, path, entity, compression))
+               for entity in ("person", "workplace", "address")}
+    problems = []
+    if relations:
+        sources.update(relation_sources(path, fmt, compression, problems))
+    report = validate_sources(sources, mode, memory_budget, sample_size, tmp_dir)
+    for issue, sample in problems:
+        report.add(issue, sample)
+    metrics.count("validate.rows", sum(report.rows.values()))
+    return report
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(
+        prog="python -m data.validate",
+        description="Check references between exported people, workplaces, addresses and relations")
+    parser.add_argument("path", help="export directory (or .xlsx file)")
+    parser.add_argument("-f", "--format", dest="fmt", choices=FORMATS, default="csv")
+    parser.add_argument("--compression", choices=[c for c in COMPRESSIONS if c], default=None)
+    parser.add_argument("--mode", choices=MODES, default="auto",
+                        help="hash sets, external-sort merge join, or hash with fallback (default)")
+    parser.add_argument("--memory", type=int, default=MEMORY_BUDGET // 1024 ** 2,
+                        help="memory budget in MiB")
+    parser.add_argument("--samples", type=int, default=SAMPLE_SIZE,
+                        help="sample records kept per issue")
+    parser.add_argument("--tmp-dir", default=None, help="directory for sorted runs")
+    parser.add_argument("--no-relations", action="store_true",
+                        help="skip the relation files (employees.csv, residents.csv, relations.json)")
+    args = parser.parse_args(argv)
+
+    report = validate(args.path, args.fmt, args.compression, args.mode,
+                      args.memory * 1024 ** 2, args.samples, args.tmp_dir, not args.no_relations)
+    print(json.dumps(report.to_dict(), indent=2, ensure_ascii=False))
+    return 0 if report.ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())